@@ -0,0 +1,113 @@
+"""
+Persistent history of council analyses.
+Reports are stored zstd-compressed, keyed by chapter, input hash, mode and
+prompt version, so re-opening a chapter doesn't pay for the same analysis twice.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+import zstandard
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Analysis, Chapter
+
+# Retention: newest N analyses per chapter and mode, none older than the cutoff
+ANALYSIS_KEEP_PER_MODE = int(os.getenv("ANALYSIS_KEEP_PER_MODE", "10"))
+ANALYSIS_RETENTION_DAYS = int(os.getenv("ANALYSIS_RETENTION_DAYS", "180"))
+
+ZSTD_LEVEL = 9
+
+_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def input_hash(*parts: str) -> str:
+    """Hash of the analyzed text plus every request field that shapes the result."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def compress(data: dict) -> bytes:
+    return _compressor.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def decompress(payload: bytes) -> dict:
+    return json.loads(_decompressor.decompress(payload))
+
+
+def find(db: Session, chapter_id: int, content_hash: str, mode: str, prompt_version: str) -> Optional[dict]:
+    """Latest stored result for exactly this input, or None."""
+    payload = (
+        db.query(Analysis.payload)
+        .filter(
+            Analysis.chapter_id == chapter_id,
+            Analysis.content_hash == content_hash,
+            Analysis.mode == mode,
+            Analysis.prompt_version == prompt_version,
+        )
+        .order_by(Analysis.created_at.desc())
+        .limit(1)
+        .scalar()
+    )
+    return decompress(payload) if payload is not None else None
+
+
+def save(db: Session, chapter_id: int, content_hash: str, mode: str, prompt_version: str, result: dict) -> Analysis:
+    row = Analysis(
+        chapter_id=chapter_id,
+        content_hash=content_hash,
+        mode=mode,
+        prompt_version=prompt_version,
+        payload=compress(result),
+    )
+    db.add(row)
+    db.commit()
+    return row
+
+
+def list_for_chapter(db: Session, chapter_id: int, mode: Optional[str] = None, limit: int = 20) -> list:
+    """Metadata of the latest analyses of a chapter (payloads stay compressed)."""
+    query = db.query(
+        Analysis.id, Analysis.mode, Analysis.content_hash, Analysis.prompt_version, Analysis.created_at
+    ).filter(Analysis.chapter_id == chapter_id)
+    if mode is not None:
+        query = query.filter(Analysis.mode == mode)
+    return query.order_by(Analysis.created_at.desc()).limit(limit).all()
+
+
+def get(db: Session, analysis_id: int) -> Optional[Analysis]:
+    return db.query(Analysis).filter(Analysis.id == analysis_id).first()
+
+
+def compact(db: Session) -> int:
+    """
+    Applies the retention policy: drops analyses past the age cutoff, of
+    deleted chapters, and beyond the newest N per chapter and mode.
+    Returns the number of rows removed.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=ANALYSIS_RETENTION_DAYS)
+    removed = db.query(Analysis).filter(Analysis.created_at < cutoff).delete(synchronize_session=False)
+
+    orphaned = ~Analysis.chapter_id.in_(db.query(Chapter.id))
+    removed += db.query(Analysis).filter(orphaned).delete(synchronize_session=False)
+
+    ranked = db.query(
+        Analysis.id,
+        func.row_number().over(
+            partition_by=(Analysis.chapter_id, Analysis.mode),
+            order_by=Analysis.created_at.desc(),
+        ).label("rank"),
+    ).subquery()
+    overflow = db.query(ranked.c.id).filter(ranked.c.rank > ANALYSIS_KEEP_PER_MODE)
+    removed += db.query(Analysis).filter(Analysis.id.in_(overflow)).delete(synchronize_session=False)
+
+    db.commit()
+    return removed
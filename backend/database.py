@@ -1,5 +1,10 @@
+import asyncio
+import logging
 import os
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -8,12 +13,78 @@ DATA_DIR = os.environ.get("ZENWRITER_DATA_DIR", ".")
 DB_PATH = os.path.join(DATA_DIR, "writer_context.db")
 
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
 
+# Storage profile applied to every new connection (env overridable)
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("ZENWRITER_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("ZENWRITER_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.environ.get("ZENWRITER_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.environ.get("ZENWRITER_SQLITE_CACHE_SIZE", "-65536")),  # Negative = KiB
+    "busy_timeout": int(os.environ.get("ZENWRITER_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": os.environ.get("ZENWRITER_SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# VACUUM only when at least this fraction of the file is free pages
+VACUUM_FREE_RATIO = float(os.environ.get("ZENWRITER_SQLITE_VACUUM_FREE_RATIO", "0.2"))
+
+logger = logging.getLogger(__name__)
+
+# Connection pool (shared by the sync and async engines)
+POOL_OPTIONS = {
+    "pool_size": int(os.environ.get("ZENWRITER_DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.environ.get("ZENWRITER_DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.environ.get("ZENWRITER_DB_POOL_TIMEOUT", "30")),
+}
+
+# Sync engine: startup (create_all), background jobs and scripts
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, **POOL_OPTIONS
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request handlers, so DB I/O doesn't tie up the threadpool
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **POOL_OPTIONS)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Write transactions begin IMMEDIATE: they queue for the write lock up front
+# (up to busy_timeout) instead of reading first and then failing with
+# "database is locked" when another process committed in between, which a
+# deferred transaction can't wait out. Same pools, different BEGIN.
+WRITE_OPTIONS = {"sqlite_begin": "IMMEDIATE"}
+WriteSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine.execution_options(**WRITE_OPTIONS)
+)
+AsyncWriteSessionLocal = async_sessionmaker(
+    async_engine.execution_options(**WRITE_OPTIONS),
+    class_=AsyncSession, autoflush=False, expire_on_commit=False,
+)
+
+# For statements that can't run inside a transaction (VACUUM, wal_checkpoint)
+NO_TRANSACTION = {"sqlite_begin": None}
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def apply_storage_profile(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+    # The driver's own implicit BEGIN is turned off; begin_transaction issues it
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+@event.listens_for(async_engine.sync_engine, "begin")
+def begin_transaction(conn):
+    mode = conn.get_execution_options().get("sqlite_begin", "DEFERRED")
+    if mode is not None:
+        conn.exec_driver_sql(f"BEGIN {mode}")
+
+
 Base = declarative_base()
 
 def get_db():
@@ -22,3 +93,57 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+_write_lock: Optional[asyncio.Lock] = None
+
+
+@asynccontextmanager
+async def async_write_session():
+    """
+    Session for code that writes (BEGIN IMMEDIATE, see WRITE_OPTIONS).
+    Writers of this process queue on a lock first, in order, so only one
+    connection per process polls for SQLite's write lock: under load the
+    busy_timeout is then spent waiting on other workers, not on ourselves.
+    """
+    global _write_lock
+    if _write_lock is None:
+        _write_lock = asyncio.Lock()
+    async with _write_lock:
+        async with AsyncWriteSessionLocal() as db:
+            yield db
+
+
+async def get_async_write_db():
+    """async_write_session() as a dependency, for handlers that only write."""
+    async with async_write_session() as db:
+        yield db
+
+
+# Maintenance jobs (run periodically off the request path, see main.py)
+def checkpoint_wal():
+    """Folds the WAL back into the database file and truncates it."""
+    with engine.connect().execution_options(**NO_TRANSACTION) as conn:
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+
+
+def optimize_database():
+    """Lets SQLite refresh the query planner statistics it needs."""
+    with engine.connect().execution_options(**NO_TRANSACTION) as conn:
+        conn.execute(text("PRAGMA optimize"))
+
+
+def vacuum_if_fragmented():
+    """Rebuilds the file when enough of it is free pages."""
+    with engine.connect().execution_options(**NO_TRANSACTION) as conn:
+        page_count = conn.execute(text("PRAGMA page_count")).scalar() or 0
+        free_pages = conn.execute(text("PRAGMA freelist_count")).scalar() or 0
+        if not page_count or free_pages / page_count < VACUUM_FREE_RATIO:
+            return
+        logger.info("VACUUM: %s de %s páginas livres", free_pages, page_count)
+        conn.execute(text("VACUUM"))
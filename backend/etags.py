@@ -0,0 +1,57 @@
+"""
+Strong ETags and conditional request checks (RFC 9110, section 13).
+Validators are built from cheap row metadata (ids, revisions, order keys),
+so a matching If-None-Match can be answered before any content is loaded.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+
+def make_etag(*parts) -> str:
+    """Quoted strong ETag from the parts that change whenever the representation does."""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def _listed(header: str) -> list:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/"x" matches "x"."""
+    if not header:
+        return False
+    tags = _listed(header)
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def match(header: Optional[str], etag: str) -> bool:
+    """If-Match uses strong comparison; a missing header always passes."""
+    if header is None:
+        return True
+    tags = _listed(header)
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_etag(response: Response, etag: str):
+    # no-cache: browsers may store the body but must revalidate (If-None-Match) each time
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def precondition_failed(etag: str) -> HTTPException:
+    return HTTPException(
+        status_code=412,
+        detail={"message": "O capítulo foi alterado em outra sessão", "etag": etag},
+        headers={"ETag": etag},
+    )
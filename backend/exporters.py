@@ -0,0 +1,217 @@
+"""
+Manuscript export: Markdown, standalone HTML and EPUB 3.
+Each exporter is an async generator over (title, content) chapter rows that
+yields output as soon as each chapter is converted, so memory stays at one
+chapter whatever the size of the book. The EPUB zip is written incrementally:
+entries are flushed as they close and the package metadata (OPF/nav), which
+needs the full chapter list, goes last.
+"""
+
+import html
+import io
+import re
+import uuid
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, List, Tuple
+
+from text_utils import TAG_RE
+
+ChapterRows = AsyncIterator[Tuple[str, str]]
+
+# Inline TipTap marks and their Markdown delimiters
+INLINE_MARKS = [
+    (re.compile(r'<(strong|b)>(.*?)</\1>', re.IGNORECASE | re.DOTALL), "**"),
+    (re.compile(r'<(em|i)>(.*?)</\1>', re.IGNORECASE | re.DOTALL), "*"),
+    (re.compile(r'<(s|strike|del)>(.*?)</\1>', re.IGNORECASE | re.DOTALL), "~~"),
+    (re.compile(r'<(code)>(.*?)</\1>', re.IGNORECASE | re.DOTALL), "`"),
+]
+LINK_RE = re.compile(r'<a\s[^>]*href="([^"]*)"[^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+HEADING_RE = re.compile(r'<h([1-6])[^>]*>(.*?)</h\1>', re.IGNORECASE | re.DOTALL)
+BLOCKQUOTE_RE = re.compile(r'<blockquote[^>]*>(.*?)</blockquote>', re.IGNORECASE | re.DOTALL)
+LIST_RE = re.compile(r'<(ul|ol)[^>]*>(.*?)</\1>', re.IGNORECASE | re.DOTALL)
+LIST_ITEM_RE = re.compile(r'<li[^>]*>(.*?)</li>', re.IGNORECASE | re.DOTALL)
+PARAGRAPH_RE = re.compile(r'<p[^>]*>(.*?)</p>', re.IGNORECASE | re.DOTALL)
+BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+HR_RE = re.compile(r'<hr\s*/?>', re.IGNORECASE)
+VOID_TAG_RE = re.compile(r'<(br|hr|img)(\s[^>]*)?\s*/?>', re.IGNORECASE)
+ENTITY_RE = re.compile(r'&([a-zA-Z][a-zA-Z0-9]*);')
+
+# Entities XHTML knows without a DTD
+XML_ENTITIES = {"amp", "lt", "gt", "quot", "apos"}
+
+
+# --- Converters ---
+
+def html_to_markdown(content: str) -> str:
+    """TipTap HTML to Markdown (plain text passes through unchanged)."""
+    if not content or "<" not in content:
+        return (content or "").strip()
+    text = content
+    for pattern, mark in INLINE_MARKS:
+        text = pattern.sub(lambda m, mark=mark: f"{mark}{m.group(2)}{mark}", text)
+    text = LINK_RE.sub(lambda m: f"[{m.group(2)}]({m.group(1)})", text)
+    text = HEADING_RE.sub(lambda m: f"\n\n{'#' * int(m.group(1))} {m.group(2).strip()}\n\n", text)
+    text = LIST_RE.sub(_markdown_list, text)
+    text = BLOCKQUOTE_RE.sub(_markdown_blockquote, text)
+    text = PARAGRAPH_RE.sub(lambda m: f"{m.group(1).strip()}\n\n", text)
+    text = BR_RE.sub("  \n", text)
+    text = HR_RE.sub("\n\n* * *\n\n", text)
+    text = html.unescape(TAG_RE.sub("", text))
+    return re.sub(r'\n{3,}', "\n\n", text).strip()
+
+
+def _markdown_list(match: re.Match) -> str:
+    ordered = match.group(1).lower() == "ol"
+    items = [TAG_RE.sub("", item).strip() for item in LIST_ITEM_RE.findall(match.group(2))]
+    lines = [f"{index}. {item}" if ordered else f"- {item}" for index, item in enumerate(items, 1)]
+    return "\n\n" + "\n".join(lines) + "\n\n"
+
+
+def _markdown_blockquote(match: re.Match) -> str:
+    inner = html_to_markdown(match.group(1))
+    return "\n\n" + "\n".join(f"> {line}" if line else ">" for line in inner.split("\n")) + "\n\n"
+
+
+def to_xhtml(content: str) -> str:
+    """
+    Makes TipTap HTML well-formed XHTML: self-closes void tags and turns
+    HTML-only named entities (&nbsp;, &eacute;...) into characters.
+    Plain text (no tags) is wrapped into paragraphs.
+    """
+    if not content:
+        return ""
+    if "<" not in content:
+        return "".join(
+            f"<p>{html.escape(para.strip(), quote=False)}</p>"
+            for para in re.split(r'\n\s*\n', content) if para.strip()
+        )
+    content = VOID_TAG_RE.sub(lambda m: f"<{m.group(1).lower()}{(m.group(2) or '').rstrip(' /')}/>", content)
+    return ENTITY_RE.sub(
+        lambda m: m.group(0) if m.group(1) in XML_ENTITIES else html.escape(html.unescape(m.group(0))),
+        content,
+    )
+
+
+# --- Exporters ---
+
+async def export_markdown(book_title: str, chapters: ChapterRows) -> AsyncIterator[bytes]:
+    yield f"# {book_title}\n\n".encode("utf-8")
+    async for title, content in chapters:
+        yield f"## {title}\n\n{html_to_markdown(content)}\n\n".encode("utf-8")
+
+
+async def export_html(book_title: str, chapters: ChapterRows) -> AsyncIterator[bytes]:
+    title = html.escape(book_title)
+    yield (
+        '<!DOCTYPE html>\n<html lang="pt-BR">\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{title}</title>\n</head>\n<body>\n<h1>{title}</h1>\n"
+    ).encode("utf-8")
+    async for chapter_title, content in chapters:
+        yield (
+            f"<section>\n<h2>{html.escape(chapter_title)}</h2>\n{to_xhtml(content)}\n</section>\n"
+        ).encode("utf-8")
+    yield b"</body>\n</html>\n"
+
+
+class ZipStream:
+    """
+    Write target for zipfile that hands out finished bytes as it goes.
+    zipfile only seeks back into the entry it is writing (to patch the local
+    header), so everything before the current entry can be drained.
+    """
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        return self._buffer.write(data)
+
+    def tell(self) -> int:
+        return self._offset + self._buffer.tell()
+
+    def seek(self, position: int, whence: int = 0) -> int:
+        if whence != 0 or position < self._offset:
+            raise io.UnsupportedOperation("seek before drained data")
+        self._buffer.seek(position - self._offset)
+        return position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._offset += len(data)
+        self._buffer = io.BytesIO()
+        return data
+
+
+EPUB_CONTAINER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">\n'
+    '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>\n'
+    '</container>\n'
+)
+
+
+def _xhtml_page(title: str, body: str, extra_ns: str = "") -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE html>\n'
+        f'<html xmlns="http://www.w3.org/1999/xhtml"{extra_ns} lang="pt-BR" xml:lang="pt-BR">\n'
+        f"<head><meta charset=\"utf-8\"/><title>{html.escape(title)}</title></head>\n"
+        f"<body>\n{body}\n</body>\n</html>\n"
+    )
+
+
+def _epub_opf(book_title: str, book_id: str, chapter_files: List[str]) -> str:
+    modified = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    manifest = "\n".join(
+        f'<item id="c{index}" href="{name}" media-type="application/xhtml+xml"/>'
+        for index, name in enumerate(chapter_files, 1)
+    )
+    spine = "\n".join(f'<itemref idref="c{index}"/>' for index in range(1, len(chapter_files) + 1))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">\n'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+        f'<dc:identifier id="book-id">urn:uuid:{book_id}</dc:identifier>\n'
+        f"<dc:title>{html.escape(book_title)}</dc:title>\n<dc:language>pt-BR</dc:language>\n"
+        f'<meta property="dcterms:modified">{modified}</meta>\n</metadata>\n'
+        '<manifest>\n<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>\n'
+        f"{manifest}\n</manifest>\n<spine>\n{spine}\n</spine>\n</package>\n"
+    )
+
+
+def _epub_nav(book_title: str, toc: List[Tuple[str, str]]) -> str:
+    items = "\n".join(f'<li><a href="{name}">{html.escape(title)}</a></li>' for name, title in toc)
+    body = f'<nav epub:type="toc" id="toc"><h1>{html.escape(book_title)}</h1>\n<ol>\n{items}\n</ol></nav>'
+    return _xhtml_page(book_title, body, extra_ns=' xmlns:epub="http://www.idpf.org/2007/ops"')
+
+
+async def export_epub(book_title: str, chapters: ChapterRows) -> AsyncIterator[bytes]:
+    stream = ZipStream()
+    toc: List[Tuple[str, str]] = []
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as book:
+        # The mimetype entry must come first and uncompressed
+        book.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        book.writestr("META-INF/container.xml", EPUB_CONTAINER)
+        yield stream.drain()
+
+        async for title, content in chapters:
+            name = f"chapter-{len(toc) + 1:04d}.xhtml"
+            body = f"<section><h1>{html.escape(title)}</h1>\n{to_xhtml(content)}</section>"
+            book.writestr(f"OEBPS/{name}", _xhtml_page(title, body))
+            toc.append((name, title))
+            yield stream.drain()
+
+        book.writestr("OEBPS/nav.xhtml", _epub_nav(book_title, toc))
+        book.writestr("OEBPS/content.opf", _epub_opf(book_title, str(uuid.uuid4()), [name for name, _ in toc]))
+    yield stream.drain()
+
+
+EXPORTERS = {
+    "markdown": (export_markdown, "text/markdown; charset=utf-8", "md"),
+    "html": (export_html, "text/html; charset=utf-8", "html"),
+    "epub": (export_epub, "application/epub+zip", "epub"),
+}
@@ -0,0 +1,34 @@
+"""
+orjson responses for data the server produced itself.
+Routes keep their response_model (it documents the schema), but returning a
+Response skips FastAPI's round trip for the result: validate it into the
+model, dump the model to a dict, encode the dict with the stdlib json. ORM
+rows and council reports are trusted, so they are encoded straight to bytes
+(orjson handles datetimes natively). Large chapters are where this pays off.
+"""
+
+from typing import Optional, Type, Union
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def orm_dict(obj, schema: Type[BaseModel]) -> dict:
+    """The schema's fields read straight off an ORM row (no validation)."""
+    return {name: getattr(obj, name) for name in schema.model_fields}
+
+
+def orm_response(obj, schema: Type[BaseModel], headers: Optional[dict] = None) -> ORJSONResponse:
+    return ORJSONResponse(orm_dict(obj, schema), headers=headers)
+
+
+def json_response(data: Union[dict, list], headers: Optional[dict] = None) -> ORJSONResponse:
+    """Plain dicts/lists built from query rows or stored JSON."""
+    return ORJSONResponse(data, headers=headers)
+
+
+def model_response(model: Optional[BaseModel], headers: Optional[dict] = None) -> Response:
+    """A model the server built, encoded by its own serializer without re-validating it."""
+    body = b"null" if model is None else model.model_dump_json()
+    return Response(body, media_type="application/json", headers=headers)
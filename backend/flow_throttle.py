@@ -0,0 +1,111 @@
+"""
+Server-side adaptive throttling of flow checks.
+Each chapter/session gets its own check interval: it stretches while the
+writer types fast (wait for the edit to settle) and shrinks while recent
+checks keep finding problems. Requests inside the window are deferred.
+"""
+
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+FLOW_MIN_INTERVAL = float(os.getenv("FLOW_MIN_INTERVAL", "5"))
+FLOW_MAX_INTERVAL = float(os.getenv("FLOW_MAX_INTERVAL", "60"))
+
+# Typing speed (chars/s) at which the interval doubles
+FLOW_VELOCITY_REF = float(os.getenv("FLOW_VELOCITY_REF", "5"))
+
+# An edit this large is always worth a check, whatever the window says
+FLOW_MEANINGFUL_CHARS = int(os.getenv("FLOW_MEANINGFUL_CHARS", "400"))
+
+# Smoothing factor for the velocity and alert-rate moving averages
+EWMA_ALPHA = 0.3
+
+# Forget chapters that haven't been checked for this long
+STATE_TTL_SECONDS = 3600
+
+
+@dataclass
+class ChapterFlowState:
+    last_check_at: float = 0.0
+    last_seen_at: float = 0.0
+    last_length: int = 0
+    last_hash: str = ""
+    pending_chars: int = 0     # Edited characters since the last real check
+    velocity: float = 0.0      # Chars/s, moving average
+    alert_rate: float = 0.0    # Fraction of recent checks that raised an alert
+    checks: int = 0
+
+
+class FlowThrottle:
+    """Decides, per chapter/session key, whether a flow check runs now."""
+
+    def __init__(self):
+        self._states: dict[str, ChapterFlowState] = {}
+        self.stats = {"checked": 0, "deferred": 0}
+        self._last_prune = 0.0
+
+    def interval_for(self, state: ChapterFlowState) -> float:
+        interval = FLOW_MIN_INTERVAL * (1 + state.velocity / FLOW_VELOCITY_REF)
+        interval *= 1 - 0.5 * state.alert_rate
+        return min(FLOW_MAX_INTERVAL, max(FLOW_MIN_INTERVAL, interval))
+
+    def admit(self, key: str, text: str, now: Optional[float] = None) -> Optional[float]:
+        """
+        Registers an incoming flow request.
+        Returns None if the check should run now, otherwise the suggested
+        retry-after in seconds.
+        """
+        now = time.monotonic() if now is None else now
+        self._prune(now)
+        state = self._states.setdefault(key, ChapterFlowState())
+
+        text_hash = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        if text_hash != state.last_hash:
+            edited = max(abs(len(text) - state.last_length), 1)
+            if state.last_seen_at:
+                elapsed = max(now - state.last_seen_at, 0.1)
+                state.velocity += EWMA_ALPHA * (edited / elapsed - state.velocity)
+            state.pending_chars += edited
+            state.last_length = len(text)
+            state.last_hash = text_hash
+        state.last_seen_at = now
+
+        interval = self.interval_for(state)
+        waited = now - state.last_check_at
+        if state.checks and state.pending_chars == 0:
+            # Nothing changed since the last check
+            self.stats["deferred"] += 1
+            return interval
+        if state.checks and waited < interval and state.pending_chars < FLOW_MEANINGFUL_CHARS:
+            self.stats["deferred"] += 1
+            return interval - waited
+
+        state.last_check_at = now
+        state.pending_chars = 0
+        state.checks += 1
+        self.stats["checked"] += 1
+        return None
+
+    def record_result(self, key: str, alerted: bool):
+        """Feeds the outcome of a check back into the alert rate."""
+        state = self._states.get(key)
+        if state is not None:
+            state.alert_rate += EWMA_ALPHA * ((1.0 if alerted else 0.0) - state.alert_rate)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "tracked_chapters": len(self._states)}
+
+    def _prune(self, now: float):
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        stale = [key for key, state in self._states.items() if now - state.last_seen_at > STATE_TTL_SECONDS]
+        for key in stale:
+            del self._states[key]
+
+
+# Singleton instance
+flow_throttle = FlowThrottle()
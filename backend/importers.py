@@ -0,0 +1,152 @@
+"""
+Manuscript import: splits a Markdown, plain-text or HTML upload into chapters.
+The splitter is fed the upload chunk by chunk and hands back each chapter as
+soon as the next chapter heading shows up, so only the chapter being read is
+held in memory. Chapters come out as TipTap HTML (paragraphs, <hr> at scene
+breaks), like the ones the editor saves.
+"""
+
+import codecs
+import html
+import re
+from typing import List, Optional, Tuple
+
+from text_utils import SCENE_BREAK_RE, TAG_RE
+
+# Title for text found before the first chapter heading
+UNTITLED = "Sem título"
+
+# "Capítulo 3", "CAPÍTULO IV", "Chapter 12: ...", "Parte II", "Prólogo", "Epílogo"
+CHAPTER_LINE_RE = re.compile(
+    r'^\s*(?:(?:cap[íi]tulo|chapter|parte|part)\s+(?:\d+|[IVXLCDM]+)\b|pr[óo]logo\b|ep[íi]logo\b).{0,80}$',
+    re.IGNORECASE,
+)
+MARKDOWN_HEADING_RE = re.compile(r'^\s{0,3}(#{1,2})\s+(.+?)\s*#*\s*$')
+
+# Markdown inline marks kept as TipTap marks
+MARKDOWN_STRONG_RE = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+MARKDOWN_EM_RE = re.compile(r'(\*|_)(?=\S)(.+?)(?<=\S)\1')
+
+# HTML uploads are cut after each closing block tag (or <hr>)
+HTML_BLOCK_END_RE = re.compile(
+    r'</(?:p|h[1-6]|blockquote|ul|ol|pre)\s*>|<hr\b[^>]*>', re.IGNORECASE
+)
+HTML_BLOCK_START_RE = re.compile(r'<(?:p|h[1-6]|blockquote|ul|ol|pre|hr)\b', re.IGNORECASE)
+HTML_HEADING_RE = re.compile(r'^<h[12]\b', re.IGNORECASE)
+
+SCENE_BREAK = "<hr>"
+
+Chapter = Tuple[str, str]  # (title, html content)
+
+
+class ManuscriptSplitter:
+    """Incremental chapter/scene splitter; feed() bytes, then close()."""
+
+    def __init__(self, format: str):
+        self.format = format
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+        self._title: Optional[str] = None
+        self._blocks: List[str] = []     # HTML blocks of the current chapter
+        self._paragraph: List[str] = []  # Lines of the current text paragraph
+        self._finished: List[Chapter] = []
+
+    def feed(self, data: bytes) -> List[Chapter]:
+        """Consumes a chunk of the upload; returns the chapters it completed."""
+        self._pending += self._decoder.decode(data)
+        self._consume(final=False)
+        return self._take()
+
+    def close(self) -> List[Chapter]:
+        self._pending += self._decoder.decode(b"", final=True)
+        self._consume(final=True)
+        self._end_paragraph()
+        self._end_chapter()
+        return self._take()
+
+    def _take(self) -> List[Chapter]:
+        finished, self._finished = self._finished, []
+        return finished
+
+    # --- Tokenizing ---
+
+    def _consume(self, final: bool):
+        if self.format == "html":
+            position = 0
+            for match in HTML_BLOCK_END_RE.finditer(self._pending):
+                self._html_block(self._pending[position:match.end()])
+                position = match.end()
+            self._pending = self._pending[position:]
+            if final and self._pending.strip():
+                self._html_block(self._pending)
+                self._pending = ""
+        else:
+            lines = self._pending.split("\n")
+            self._pending = "" if final else lines.pop()
+            for line in lines:
+                self._text_line(line.rstrip("\r"))
+
+    def _text_line(self, line: str):
+        if not line.strip():
+            self._end_paragraph()
+            return
+        title = self._heading(line)
+        if title is not None:
+            self._end_paragraph()
+            self._start_chapter(title)
+        elif SCENE_BREAK_RE.fullmatch(line.strip()):
+            self._end_paragraph()
+            self._scene_break()
+        else:
+            self._paragraph.append(line.strip())
+
+    def _heading(self, line: str) -> Optional[str]:
+        if self.format == "markdown":
+            match = MARKDOWN_HEADING_RE.match(line)
+            if match:
+                return match.group(2)
+        if CHAPTER_LINE_RE.match(line):
+            return line.strip()
+        return None
+
+    def _html_block(self, block: str):
+        start = HTML_BLOCK_START_RE.search(block)
+        if start is None:
+            return  # Wrapper markup (<html>, <body>...) between blocks
+        block = block[start.start():].strip()
+        if block.lower().startswith("<hr"):
+            self._scene_break()
+            return
+        text = html.unescape(TAG_RE.sub("", block)).strip()
+        if HTML_HEADING_RE.match(block) or CHAPTER_LINE_RE.match(text):
+            self._start_chapter(text)
+        elif text or "<img" in block.lower():
+            self._blocks.append(block)
+
+    # --- Building chapters ---
+
+    def _end_paragraph(self):
+        if not self._paragraph:
+            return
+        # Hard-wrapped lines of one paragraph are joined back together
+        text = html.escape(" ".join(self._paragraph), quote=False)
+        if self.format == "markdown":
+            text = MARKDOWN_STRONG_RE.sub(r"<strong>\2</strong>", text)
+            text = MARKDOWN_EM_RE.sub(r"<em>\2</em>", text)
+        self._blocks.append(f"<p>{text}</p>")
+        self._paragraph = []
+
+    def _scene_break(self):
+        if self._blocks and self._blocks[-1] != SCENE_BREAK:
+            self._blocks.append(SCENE_BREAK)
+
+    def _start_chapter(self, title: str):
+        self._end_chapter()
+        self._title = title
+
+    def _end_chapter(self):
+        while self._blocks and self._blocks[-1] == SCENE_BREAK:
+            self._blocks.pop()
+        if self._title is not None or self._blocks:
+            self._finished.append((self._title or UNTITLED, "".join(self._blocks)))
+        self._title, self._blocks = None, []
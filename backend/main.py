@@ -1,24 +1,131 @@
+import asyncio
+import logging
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 # Metadata
-from database import engine, Base
+from database import (
+    engine, async_engine, Base, WriteSessionLocal, WRITE_OPTIONS,
+    checkpoint_wal, optimize_database, vacuum_if_fragmented,
+)
+import analysis_store
+import compression
+import revisions
+from migrations import run_migrations
 from routes_council import router as council_router
 from routes_chapters import router as chapters_router
+from routes_search import router as search_router
+from routes_projects import router as projects_router
+from routes_analysis import router as analysis_router
+import startup_profile
+from summaries import summary_service
+from orchestrator import PROVIDER_CONCURRENCY, WORKER_PROVIDER_CONCURRENCY, council
+import workers
+
+logger = logging.getLogger(__name__)
+
+# How often stored analyses are compacted (retention policy)
+ANALYSIS_COMPACT_INTERVAL = float(os.getenv("ANALYSIS_COMPACT_INTERVAL", str(6 * 3600)))
+
+# How often old chapter revisions are thinned out
+REVISION_COMPACT_INTERVAL = float(os.getenv("REVISION_COMPACT_INTERVAL", str(6 * 3600)))
+
+# SQLite maintenance intervals, in seconds
+WAL_CHECKPOINT_INTERVAL = float(os.getenv("ZENWRITER_WAL_CHECKPOINT_INTERVAL", "600"))
+OPTIMIZE_INTERVAL = float(os.getenv("ZENWRITER_OPTIMIZE_INTERVAL", "3600"))
+VACUUM_INTERVAL = float(os.getenv("ZENWRITER_VACUUM_INTERVAL", str(24 * 3600)))
+
+# Non-essential startup work (council clients, summary catch-up, compaction)
+# waits this long, so the socket is bound and the first requests are served first
+DEFERRED_STARTUP_SECONDS = float(os.getenv("ZENWRITER_DEFERRED_STARTUP_SECONDS", "2"))
+
+
+async def run_periodically(interval: float, job, initial_delay: float = 0.0):
+    """Runs a blocking maintenance job in a worker thread every `interval` seconds."""
+    await asyncio.sleep(initial_delay)
+    while True:
+        try:
+            await asyncio.to_thread(job)
+        except Exception:
+            logger.exception("Falha na tarefa de manutenção %s", job.__name__)
+        await asyncio.sleep(interval)
+
+
+def compact_analyses():
+    with WriteSessionLocal() as db:
+        analysis_store.compact(db)
+
+
+def compact_revisions():
+    with WriteSessionLocal() as db:
+        revisions.compact_all(db)
+
+
+async def warm_up_council():
+    await asyncio.sleep(DEFERRED_STARTUP_SECONDS)
+    # Imports the LangChain provider packages (seconds) off the event loop
+    with startup_profile.phase("council warm-up"):
+        await asyncio.to_thread(council.warm_up)
+
+
+async def run_background_jobs():
+    """Summary catch-up and maintenance, in the one worker holding the jobs lock."""
+    await asyncio.sleep(DEFERRED_STARTUP_SECONDS)
+    while not workers.acquire_job_lock():
+        await asyncio.sleep(workers.JOB_LOCK_RETRY_SECONDS)
+    await asyncio.gather(
+        # Background summaries: catch up on chapters edited while we were down
+        summary_service.sweep(),
+        run_periodically(ANALYSIS_COMPACT_INTERVAL, compact_analyses),
+        run_periodically(REVISION_COMPACT_INTERVAL, compact_revisions),
+        run_periodically(WAL_CHECKPOINT_INTERVAL, checkpoint_wal, WAL_CHECKPOINT_INTERVAL),
+        run_periodically(OPTIMIZE_INTERVAL, optimize_database, OPTIMIZE_INTERVAL),
+        run_periodically(VACUUM_INTERVAL, vacuum_if_fragmented, VACUUM_INTERVAL),
+        return_exceptions=True,
+    )
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create tables
-    Base.metadata.create_all(bind=engine)
+    # Startup: Create tables (one worker at a time)
+    with workers.startup_lock():
+        with startup_profile.phase("create tables"):
+            Base.metadata.create_all(bind=engine.execution_options(**WRITE_OPTIONS))
+        with startup_profile.phase("migrations"):
+            run_migrations(engine)
+    if workers.WEB_CONCURRENCY * WORKER_PROVIDER_CONCURRENCY > PROVIDER_CONCURRENCY:
+        logger.warning(
+            "%d workers x %d calls per provider exceed COUNCIL_PROVIDER_CONCURRENCY=%d "
+            "(each worker needs at least one slot)",
+            workers.WEB_CONCURRENCY, WORKER_PROVIDER_CONCURRENCY, PROVIDER_CONCURRENCY,
+        )
+    summary_service.start()
+    background = [
+        asyncio.create_task(warm_up_council()),
+        asyncio.create_task(run_background_jobs()),
+    ]
     yield
     # Shutdown
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    workers.release_job_lock()
+    await summary_service.stop()
+    await async_engine.dispose()
 
-app = FastAPI(title="Ghost Writer API", lifespan=lifespan)
+# Validated responses are rendered with orjson too (see fast_json for the unvalidated path)
+app = FastAPI(title="Ghost Writer API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Include routers
 app.include_router(council_router)
 app.include_router(chapters_router)
+app.include_router(search_router)
+app.include_router(projects_router)
+app.include_router(analysis_router)
 
 # CORS (Allowing frontend - local dev, Tauri app, and production)
 app.add_middleware(
@@ -31,8 +138,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# zstd/gzip for responses over COMPRESSION_MIN_SIZE (and every streamed one)
+app.add_middleware(compression.CompressionMiddleware)
+
 @app.get("/")
 def read_root():
     return {"message": "Ghost Writer API Operational"}
@@ -40,3 +151,8 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/compression/stats")
+def compression_stats():
+    """Responses compressed, bytes in/out and CPU seconds spent, per encoding."""
+    return compression.get_stats()
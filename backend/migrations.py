@@ -0,0 +1,186 @@
+"""
+Schema migrations for existing databases.
+create_all() only creates missing tables; columns added to existing tables
+(and their backfills) are applied here, tracked with PRAGMA user_version.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from database import WRITE_OPTIONS
+from models import ORDER_GAP
+import project_stats
+import revisions
+from search_index import FTS_DDL, FTS_TABLE
+from text_utils import content_hash, count_words, get_preview, strip_html
+
+BACKFILL_BATCH = 500
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.exec_driver_sql(f"PRAGMA table_info({table})"))
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str):
+    """ALTER TABLE ... ADD COLUMN, skipped when create_all() already made it."""
+    if not has_column(conn, table, column):
+        conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN "{column}" {ddl}')
+
+
+def add_chapter_preview(conn: Connection):
+    """Denormalized card preview, so listing chapters never reads content."""
+    add_column(conn, "chapters", "preview", "VARCHAR DEFAULT ''")
+    backfill_chapters(conn, "content", lambda row: {"preview": get_preview(row.content or "")})
+
+
+def backfill_chapters(conn: Connection, source_columns: str, compute):
+    """Recomputes derived chapter columns in id-ordered batches (bounded memory)."""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(f"SELECT id, {source_columns} FROM chapters WHERE id > :last ORDER BY id LIMIT :limit"),
+            {"last": last_id, "limit": BACKFILL_BATCH},
+        ).fetchall()
+        if not rows:
+            return
+        updates = [{"id": row.id, **compute(row)} for row in rows]
+        assignments = ", ".join(f"{column} = :{column}" for column in updates[0] if column != "id")
+        conn.execute(text(f"UPDATE chapters SET {assignments} WHERE id = :id"), updates)
+        last_id = rows[-1].id
+
+
+def sparse_chapter_order(conn: Connection):
+    """Spreads 0..N-1 order values into sparse keys (see ORDER_GAP)."""
+    conn.exec_driver_sql(
+        'UPDATE chapters SET "order" = (SELECT position FROM ('
+        '  SELECT id, ROW_NUMBER() OVER (ORDER BY "order", id) AS position FROM chapters'
+        f') ranked WHERE ranked.id = chapters.id) * {ORDER_GAP}'
+    )
+
+
+def add_chapter_revision(conn: Connection):
+    """Revision counter for delta saves (base_revision checks)."""
+    add_column(conn, "chapters", "revision", "INTEGER NOT NULL DEFAULT 0")
+
+
+def add_chapter_search(conn: Connection):
+    """FTS5 index over chapter titles and plain text, filled in id-ordered batches."""
+    conn.exec_driver_sql(FTS_DDL)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, title, content FROM chapters WHERE id > :last ORDER BY id LIMIT :limit"),
+            {"last": last_id, "limit": BACKFILL_BATCH},
+        ).fetchall()
+        if not rows:
+            return
+        conn.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (:id, :title, :body)"),
+            [{"id": row.id, "title": row.title, "body": strip_html(row.content or "")} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def add_chapter_plain_text(conn: Connection):
+    """
+    Plain-text shadow of the content; word counts and previews were computed
+    on the markup, so they are recomputed from it. Summaries keyed on the old
+    content hash are re-keyed to the plain-text hash instead of regenerated.
+    """
+    add_column(conn, "chapters", "plain_text", "TEXT DEFAULT ''")
+
+    def derived(row) -> dict:
+        plain_text = strip_html(row.content or "")
+        return {"plain_text": plain_text, "word_count": count_words(plain_text), "preview": get_preview(plain_text)}
+
+    backfill_chapters(conn, "content", derived)
+    rekeyed = [
+        {"chapter_id": row.id, "new_hash": content_hash(row.plain_text)}
+        for row in conn.execute(text(
+            "SELECT chapters.id, chapters.content, chapters.plain_text, chapter_summaries.content_hash "
+            "FROM chapters JOIN chapter_summaries ON chapter_summaries.chapter_id = chapters.id"
+        ))
+        if row.content_hash == content_hash(row.content)
+    ]
+    if rekeyed:
+        conn.execute(
+            text("UPDATE chapter_summaries SET content_hash = :new_hash WHERE chapter_id = :chapter_id"),
+            rekeyed,
+        )
+
+
+def add_project_stats(conn: Connection):
+    """Materialized chapter stats and project rollups (tables made by create_all)."""
+    project_stats.rebuild(conn)
+
+
+def add_chapter_project_order_index(conn: Connection):
+    """Composite index for project-scoped listing and per-project MAX(order)."""
+    conn.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_chapters_project_order ON chapters (project_id, "order")'
+    )
+
+
+def add_revision_baselines(conn: Connection):
+    """
+    Snapshot of the current text for chapters saved before revision history
+    existed, so their original content can still be viewed and restored.
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, revision, content, updated_at FROM chapters WHERE id > :last AND NOT EXISTS "
+                "(SELECT 1 FROM chapter_revisions WHERE chapter_id = chapters.id) ORDER BY id LIMIT :limit"
+            ),
+            {"last": last_id, "limit": BACKFILL_BATCH},
+        ).fetchall()
+        if not rows:
+            return
+        conn.execute(
+            text(
+                "INSERT INTO chapter_revisions (chapter_id, revision, kind, payload, created_at) "
+                "VALUES (:chapter_id, :revision, :kind, :payload, COALESCE(:created_at, CURRENT_TIMESTAMP))"
+            ),
+            [
+                {"chapter_id": row.id, "revision": row.revision, "kind": revisions.SNAPSHOT,
+                 "payload": revisions.encode_snapshot(row.content or ""), "created_at": row.updated_at}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def add_project_list_version(conn: Connection):
+    """Per-project card list version (list ETags without aggregating chapters)."""
+    add_column(conn, "project_stats", "list_version", "INTEGER NOT NULL DEFAULT 0")
+
+
+def recount_adjective_forms(conn: Connection):
+    """Stored adjective counts missed irregular forms (boa, cruéis, frágeis...)."""
+    project_stats.rebuild(conn)
+
+
+# (user_version after the step, step)
+MIGRATIONS = [
+    (1, add_chapter_preview),
+    (2, sparse_chapter_order),
+    (3, add_chapter_revision),
+    (4, add_chapter_search),
+    (5, add_chapter_plain_text),
+    (6, add_project_stats),
+    (7, add_chapter_project_order_index),
+    (8, add_revision_baselines),
+    (9, add_project_list_version),
+    (10, recount_adjective_forms),
+]
+
+
+def run_migrations(engine: Engine):
+    # IMMEDIATE: other workers may already be serving (and writing)
+    with engine.execution_options(**WRITE_OPTIONS).begin() as conn:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+        for target, step in MIGRATIONS:
+            if version < target:
+                step(conn)
+                conn.exec_driver_sql(f"PRAGMA user_version = {target}")
@@ -1,8 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
 
+# Chapter.order uses sparse keys: moving a card takes the midpoint between its
+# new neighbours, so only that row changes
+ORDER_GAP = 1024
+
+# Project id that addresses the chapters without a project (API paths, stats rows)
+UNASSIGNED_PROJECT = 0
+
+
 class Project(Base):
     __tablename__ = "projects"
 
@@ -16,13 +24,20 @@ class Project(Base):
 
 class Chapter(Base):
     __tablename__ = "chapters"
+    __table_args__ = (
+        # Project-scoped listing (keyset pages) and per-project MAX(order)
+        Index("ix_chapters_project_order", "project_id", "order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     title = Column(String, default="Novo Capítulo")
     content = Column(Text, default="")  # The actual prose content
+    plain_text = Column(Text, default="")  # Content without markup, extracted on write
     order = Column(Integer, default=0)
     word_count = Column(Integer, default=0)
+    preview = Column(String, default="")  # Card text, kept in sync on write
+    revision = Column(Integer, default=0, nullable=False)  # Bumped on every save
     color = Column(String, nullable=True)  # Optional card color
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -30,6 +45,101 @@ class Chapter(Base):
     project = relationship("Project", back_populates="chapters")
     scenes = relationship("Scene", back_populates="chapter")
 
+
+def project_scope(project_id: int):
+    """Chapter filter for a project id (UNASSIGNED_PROJECT = chapters without a project)."""
+    if project_id == UNASSIGNED_PROJECT:
+        return Chapter.project_id.is_(None)
+    return Chapter.project_id == project_id
+
+
+class ChapterSummary(Base):
+    """Cached LLM summary of a chapter, valid while content_hash matches."""
+    __tablename__ = "chapter_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chapter_id = Column(Integer, ForeignKey("chapters.id"), unique=True, index=True)
+    content_hash = Column(String)
+    summary = Column(Text, default="")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ProjectSummary(Base):
+    """Rolled-up summary of a project's chapter summaries."""
+    __tablename__ = "project_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True, index=True)
+    source_hash = Column(String)  # Hash of the chapter summary hashes it was built from
+    summary = Column(Text, default="")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Analysis(Base):
+    """Stored council result (PolishReport/AnalysisResult), zstd-compressed JSON."""
+    __tablename__ = "analyses"
+    __table_args__ = (
+        Index("ix_analyses_lookup", "chapter_id", "content_hash", "mode", "prompt_version"),
+        Index("ix_analyses_chapter_created", "chapter_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    chapter_id = Column(Integer, ForeignKey("chapters.id"), nullable=False)
+    content_hash = Column(String, nullable=False)  # Hash of the analyzed text and request parameters
+    mode = Column(String, nullable=False)  # "doubt", "polish"
+    prompt_version = Column(String, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ChapterRevision(Base):
+    """One stored save of a chapter: a full snapshot or a delta (zstd-compressed)."""
+    __tablename__ = "chapter_revisions"
+    __table_args__ = (
+        Index("ix_chapter_revisions_chapter_revision", "chapter_id", "revision", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    chapter_id = Column(Integer, ForeignKey("chapters.id"), nullable=False)
+    revision = Column(Integer, nullable=False)
+    kind = Column(String, nullable=False)  # "snapshot" or "delta" (vs. previous stored revision)
+    payload = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class StyleCountsMixin:
+    """Additive style counts (see style_metrics.COUNT_FIELDS) shared by the stat rows."""
+    words = Column(Integer, default=0, nullable=False)
+    sentences = Column(Integer, default=0, nullable=False)
+    sentence_words_sq = Column(Integer, default=0, nullable=False)
+    long_sentences = Column(Integer, default=0, nullable=False)
+    short_sentences = Column(Integer, default=0, nullable=False)
+    commas = Column(Integer, default=0, nullable=False)
+    semicolons_colons = Column(Integer, default=0, nullable=False)
+    dashes = Column(Integer, default=0, nullable=False)
+    questions = Column(Integer, default=0, nullable=False)
+    subordinators = Column(Integer, default=0, nullable=False)
+    adjectives = Column(Integer, default=0, nullable=False)
+    lazy_adjectives = Column(Integer, default=0, nullable=False)
+    exclamation_sentences = Column(Integer, default=0, nullable=False)
+    intensifiers = Column(Integer, default=0, nullable=False)
+    hesitations = Column(Integer, default=0, nullable=False)
+
+class ChapterStats(StyleCountsMixin, Base):
+    """Stats of one chapter, recomputed from its plain text on every content write."""
+    __tablename__ = "chapter_stats"
+
+    chapter_id = Column(Integer, ForeignKey("chapters.id"), primary_key=True)
+    project_id = Column(Integer, nullable=False, index=True)  # UNASSIGNED_PROJECT for none
+    word_count = Column(Integer, default=0, nullable=False)
+
+class ProjectStats(StyleCountsMixin, Base):
+    """Sum of a project's chapter stats, kept current by applying per-save deltas."""
+    __tablename__ = "project_stats"
+
+    project_id = Column(Integer, primary_key=True)  # UNASSIGNED_PROJECT for none
+    chapter_count = Column(Integer, default=0, nullable=False)
+    word_count = Column(Integer, default=0, nullable=False)
+    list_version = Column(Integer, default=0, nullable=False)  # Bumped by every write to a card
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Scene(Base):
     __tablename__ = "scenes"
 
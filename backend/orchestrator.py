@@ -4,20 +4,77 @@ Manages the three activation modes: Flow, Doubt, and Polish.
 """
 
 import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import time
 from typing import Literal, Optional
 from pydantic import BaseModel
-from enum import Enum
+from enum import Enum, IntEnum
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# LangChain imports for multi-LLM
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+# LangChain imports for multi-LLM (provider packages are imported on first use, see LazyProvider)
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from text_utils import split_into_chunks
+from workers import partitioned
+
+# Max concurrent in-flight calls per provider (map-reduce fans out per chunk),
+# for the whole deployment: each worker process gets its share (see workers.py)
+PROVIDER_CONCURRENCY = int(os.getenv("COUNCIL_PROVIDER_CONCURRENCY", "4"))
+
+# Map-reduce polish: chunk size, and the length above which it kicks in automatically
+CHUNK_WORDS = int(os.getenv("COUNCIL_CHUNK_WORDS", "1500"))
+CHUNKED_THRESHOLD_WORDS = int(os.getenv("COUNCIL_CHUNKED_THRESHOLD_WORDS", "3000"))
+
+# Weight of the newest sample in the latency averages that decide whether a
+# pipelined polish pre-summarizes (see _pipelined_experts)
+LATENCY_EMA_WEIGHT = 0.3
+
+
+class Priority(IntEnum):
+    """Scheduling classes for provider calls (lower value = served first)."""
+    FLOW = 0      # Interactive consistency checks while typing
+    DOUBT = 1     # Writer waiting on a specific question
+    POLISH = 2    # Full council report
+    BATCH = 3     # Background work (summaries, batch polish)
+
+
+# Per provider: max concurrent calls of each class, and how many slots must
+# stay free for higher classes before a call of this class may start
+CLASS_QUOTAS = {
+    Priority.FLOW: int(os.getenv("COUNCIL_QUOTA_FLOW", str(PROVIDER_CONCURRENCY))),
+    Priority.DOUBT: int(os.getenv("COUNCIL_QUOTA_DOUBT", str(PROVIDER_CONCURRENCY))),
+    Priority.POLISH: int(os.getenv("COUNCIL_QUOTA_POLISH", "3")),
+    Priority.BATCH: int(os.getenv("COUNCIL_QUOTA_BATCH", "1")),
+}
+CLASS_RESERVES = {
+    Priority.FLOW: 0,
+    Priority.DOUBT: 0,
+    Priority.POLISH: 1,
+    Priority.BATCH: 2,
+}
+
+# This process's share (all workers together stay within PROVIDER_CONCURRENCY
+# as long as there are no more workers than slots)
+WORKER_PROVIDER_CONCURRENCY = partitioned(PROVIDER_CONCURRENCY)
+
+
+def scaled_reserves(capacity: int) -> dict:
+    """
+    CLASS_RESERVES shrunk in proportion to a smaller budget (a worker's share,
+    rounded up), always leaving lower classes at least one slot.
+    """
+    return {
+        priority: max(0, min(reserve, math.ceil(reserve * capacity / PROVIDER_CONCURRENCY), capacity - 1))
+        for priority, reserve in CLASS_RESERVES.items()
+    }
+
 
 class ActivationMode(str, Enum):
     FLOW = "flow"        # Passive monitoring (Gemini leads)
@@ -52,29 +109,192 @@ class PolishReport(BaseModel):
     divergence: str
     verdict: str
 
+    # Latency breakdown per phase, in milliseconds since the request started
+    timings: Optional[dict[str, float]] = None
+
+    # Chunks each expert analyzed (1 unless map-reduce kicked in)
+    chunks: Optional[int] = None
+
+    # Served from a stored analysis (timings are then dropped: nothing ran)
+    cached: bool = False
+
+
+# Labels used when the synthesis prompts quote each expert
+EXPERT_LABELS = {
+    "claude_style": "Especialista - Estilo (Claude)",
+    "gemini_coherence": "Especialista - Coerência (Gemini)",
+    "gpt_structure": "Especialista - Estrutura (GPT)",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for accounting."""
+    return len(text) // 4 + 1 if text else 0
+
+
+class ProviderPool:
+    """Concurrency budget of one provider, shared by all priority classes."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.reserves = scaled_reserves(capacity)
+        self.in_use = {priority: 0 for priority in Priority}
+        self.waiters: list = []  # Heap of (priority, seq, future)
+
+    def can_start(self, priority: Priority) -> bool:
+        busy = sum(self.in_use.values())
+        return (
+            self.in_use[priority] < CLASS_QUOTAS[priority]
+            and busy < self.capacity - self.reserves[priority]
+        )
+
+
+class CouncilScheduler:
+    """
+    Admits provider calls by priority class.
+    Interactive classes are always served first; polish and batch calls are
+    delayed while the provider budget is tight (they cannot take the slots
+    reserved for higher classes) and are capped by per-class quotas.
+    Queue wait is measured per class.
+    """
+
+    def __init__(self, capacity: int = WORKER_PROVIDER_CONCURRENCY):
+        self.capacity = capacity
+        self._pools: dict[int, ProviderPool] = {}
+        self._seq = itertools.count()
+        self.wait_stats = {
+            priority: {"calls": 0, "queued": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+            for priority in Priority
+        }
+
+    def _pool(self, provider_key: int) -> ProviderPool:
+        pool = self._pools.get(provider_key)
+        if pool is None:
+            pool = self._pools[provider_key] = ProviderPool(self.capacity)
+        return pool
+
+    async def acquire(self, provider_key: int, priority: Priority):
+        pool = self._pool(provider_key)
+        enqueued = time.perf_counter()
+        stats = self.wait_stats[priority]
+        stats["calls"] += 1
+
+        blocked_by_higher = any(p <= priority for p, _, f in pool.waiters if not f.done())
+        if not blocked_by_higher and pool.can_start(priority):
+            pool.in_use[priority] += 1
+        else:
+            stats["queued"] += 1
+            granted = asyncio.get_running_loop().create_future()
+            heapq.heappush(pool.waiters, (priority, next(self._seq), granted))
+            try:
+                await granted
+            except asyncio.CancelledError:
+                if granted.done() and not granted.cancelled():
+                    # The slot was granted just as we were cancelled: hand it back
+                    self.release(provider_key, priority)
+                raise
+
+        waited = (time.perf_counter() - enqueued) * 1000
+        stats["total_wait_ms"] += waited
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], waited)
+
+    def release(self, provider_key: int, priority: Priority):
+        pool = self._pool(provider_key)
+        pool.in_use[priority] -= 1
+        self._dispatch(pool)
+
+    def _dispatch(self, pool: ProviderPool):
+        """Grants freed slots to waiters, highest class first."""
+        still_waiting = []
+        while pool.waiters:
+            priority, seq, granted = heapq.heappop(pool.waiters)
+            if granted.done():
+                continue  # Cancelled while queued
+            if pool.can_start(priority):
+                pool.in_use[priority] += 1
+                granted.set_result(None)
+            else:
+                still_waiting.append((priority, seq, granted))
+        for waiter in still_waiting:
+            heapq.heappush(pool.waiters, waiter)
+
+    def get_stats(self) -> dict:
+        classes = {}
+        for priority, stats in self.wait_stats.items():
+            classes[priority.name.lower()] = {
+                **{key: round(value, 1) for key, value in stats.items()},
+                "avg_wait_ms": round(stats["total_wait_ms"] / stats["calls"], 1) if stats["calls"] else 0.0,
+                "in_flight": sum(pool.in_use[priority] for pool in self._pools.values()),
+                "waiting": sum(
+                    1 for pool in self._pools.values()
+                    for p, _, f in pool.waiters if p == priority and not f.done()
+                ),
+            }
+        return classes
+
+
+# Initialize the three LLMs
+# Note: Using best available models to represent the future versions requested
+def _make_claude():
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(
+        model="claude-3-5-sonnet-latest", # Represents latest Sonnet (targeting 4.5 if available via this alias)
+        api_key=os.getenv("ANTHROPIC_API_KEY", "dummy_anthropic_key")
+    )
+
+
+def _make_gemini():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-1.5-pro", # Represents Gemini 3.0 Pro
+        google_api_key=os.getenv("GOOGLE_API_KEY", "dummy_google_key")
+    )
+
+
+def _make_gpt():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4o", # Represents GPT-5.2 Thinking
+        api_key=os.getenv("OPENAI_API_KEY", "dummy_openai_key")
+    )
+
+
+class LazyProvider:
+    """
+    Council attribute that builds its LLM client on first access.
+    The three LangChain provider packages take ~3 s to import, which would
+    otherwise all be paid before the server can answer its first request.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __set_name__(self, owner, name):
+        self.attribute = f"_{name}"
+
+    def __get__(self, council, owner=None):
+        if council is None:
+            return self
+        client = council.__dict__.get(self.attribute)
+        if client is None:
+            client = council.__dict__[self.attribute] = self.factory()
+        return client
+
+    def __set__(self, council, client):
+        council.__dict__[self.attribute] = client
+
 
 class EditorialCouncil:
     """
     The Tripartite Intelligence Orchestrator.
     Manages Claude (Style), Gemini (Coherence), and GPT (Structure).
     """
-    
-    def __init__(self):
-        # Initialize the three LLMs
-        # Note: Using best available models to represent the future versions requested
-        self.claude = ChatAnthropic(
-            model="claude-3-5-sonnet-latest", # Represents latest Sonnet (targeting 4.5 if available via this alias)
-            api_key=os.getenv("ANTHROPIC_API_KEY", "dummy_anthropic_key")
-        )
-        self.gemini = ChatGoogleGenerativeAI(
-            model="gemini-1.5-pro", # Represents Gemini 3.0 Pro
-            google_api_key=os.getenv("GOOGLE_API_KEY", "dummy_google_key")
-        )
-        self.gpt = ChatOpenAI(
-            model="gpt-4o", # Represents GPT-5.2 Thinking
-            api_key=os.getenv("OPENAI_API_KEY", "dummy_openai_key")
-        )
 
+    claude = LazyProvider(_make_claude)
+    gemini = LazyProvider(_make_gemini)
+    gpt = LazyProvider(_make_gpt)
+
+    def __init__(self):
         # Load Style DNA (try multiple paths for different environments)
         style_dna_paths = [
             os.path.join(os.path.dirname(__file__), "style_dna.md"),  # Same folder as orchestrator
@@ -90,6 +310,28 @@ class EditorialCouncil:
             self.style_dna_content = "Estilo: Metamodernismo. Referências: Ben Lerner, Rachel Cusk. Evite melodrama."
 
         
+        # Flow request generations per session/chapter: a newer request
+        # supersedes (and cancels) the one still waiting on the provider.
+        # Generations come from one counter, so a key can be dropped once its
+        # latest request is done and reused later without ambiguity.
+        self._flow_generation_counter = itertools.count(1)
+        self._flow_generations: dict[str, int] = {}
+        self._flow_tasks: dict[str, asyncio.Task] = {}
+
+        # Priority-aware admission of provider calls
+        self.scheduler = CouncilScheduler()
+
+        # Moving averages of polish step durations in ms (experts, synthesis steps)
+        self.latency_ms: dict[str, float] = {}
+
+        # Work abandoned before the provider answered (superseded or disconnected)
+        self.cancellation_stats = {
+            "superseded_requests": 0,
+            "disconnected_requests": 0,
+            "cancelled_calls": 0,
+            "cancelled_prompt_tokens": 0,
+        }
+
         # System prompts for each role (The "Prompt Map")
         self.prompts = {
             "claude_style": f"""Você é o Consultor de Estilo. Sua função é analisar o trecho enviado e avaliar a densidade da prosa.
@@ -124,7 +366,50 @@ DIRETRIZES DE ANÁLISE:
 Processo: Pense passo a passo sobre os riscos narrativos antes de dar seu veredito.
 Saída: Um breve diagnóstico estrutural e uma pergunta provocativa para o autor refletir sobre o rumo da cena."""
         }
+
+        # Stored analyses are only reused while the prompts (and Style DNA) are unchanged
+        self.prompt_version = hashlib.sha256(
+            json.dumps(self.prompts, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
     
+    async def _invoke(self, llm, messages: list, priority: Priority):
+        """
+        Single entry point for provider calls.
+        Waits for a provider slot in the given priority class and records the
+        prompt tokens thrown away when a call is cancelled mid-flight.
+        """
+        await self.scheduler.acquire(id(llm), priority)
+        try:
+            return await llm.ainvoke(messages)
+        except asyncio.CancelledError:
+            self.cancellation_stats["cancelled_calls"] += 1
+            self.cancellation_stats["cancelled_prompt_tokens"] += sum(
+                estimate_tokens(m.content) for m in messages
+            )
+            raise
+        finally:
+            self.scheduler.release(id(llm), priority)
+
+    def warm_up(self):
+        """Builds the provider clients ahead of the first council request (blocking)."""
+        for name in ("claude", "gemini", "gpt"):
+            getattr(self, name)
+
+    def get_stats(self) -> dict:
+        """Runtime counters exposed by the /council/stats endpoint."""
+        return {
+            "cancellation": dict(self.cancellation_stats),
+            "flow_in_flight": len(self._flow_tasks),
+            "scheduler": self.scheduler.get_stats(),
+            "latency_ms": {key: round(value, 1) for key, value in self.latency_ms.items()},
+        }
+
+    def _observe_latency(self, key: str, elapsed_ms: float):
+        previous = self.latency_ms.get(key)
+        self.latency_ms[key] = elapsed_ms if previous is None else (
+            previous + LATENCY_EMA_WEIGHT * (elapsed_ms - previous)
+        )
+
     def generate_context_package(self, project_name: str, style_ref: str, chapter: str, scene: str, emotional_state: str) -> str:
         """Generates the 'Briefing' header for prompts."""
         return f"""Contexto do Projeto: "Você está trabalhando no projeto literário '{project_name}'. 
@@ -133,11 +418,44 @@ Localização na Trama: Capítulo {chapter}, Cena {scene}.
 Estado Emocional do Protagonista: {emotional_state}."
 """
 
-    async def flow_mode(self, current_text: str, manuscript_context: str) -> Optional[ConsistencyAlert]:
+    async def flow_mode(self,
+                        current_text: str,
+                        manuscript_context: str,
+                        session_key: Optional[str] = None) -> Optional[ConsistencyAlert]:
         """
         FLOW MODE: Passive monitoring by Gemini.
         Only alerts when inconsistency detected.
+
+        When a session_key is given, a newer request for the same key cancels
+        the one still in flight; the superseded call returns None.
         """
+        if session_key is None:
+            return await self._flow_check(current_text, manuscript_context)
+
+        generation = next(self._flow_generation_counter)
+        self._flow_generations[session_key] = generation
+
+        stale = self._flow_tasks.get(session_key)
+        if stale is not None and not stale.done():
+            stale.cancel()
+            self.cancellation_stats["superseded_requests"] += 1
+
+        task = asyncio.ensure_future(self._flow_check(current_text, manuscript_context))
+        self._flow_tasks[session_key] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if self._flow_generations.get(session_key) != generation:
+                return None  # Superseded by a newer request
+            raise
+        finally:
+            if self._flow_tasks.get(session_key) is task:
+                del self._flow_tasks[session_key]
+            if self._flow_generations.get(session_key) == generation:
+                del self._flow_generations[session_key]  # Latest request for the key: forget it
+
+    async def _flow_check(self, current_text: str, manuscript_context: str) -> Optional[ConsistencyAlert]:
+        """Runs the actual Gemini consistency check for flow mode."""
         prompt = f"""Contexto do manuscrito:
 {manuscript_context}
 
@@ -150,10 +468,10 @@ Verifique APENAS inconsistências factuais (tempo, lugar, detalhes de personagen
 Se não houver problemas, responda apenas: "OK"
 Se houver, responda em JSON: {{"type": "...", "severity": "...", "message": "...", "suggestion": "..."}}"""
 
-        response = await self.gemini.ainvoke([
+        response = await self._invoke(self.gemini, [
             SystemMessage(content=self.prompts["gemini_coherence"]),
             HumanMessage(content=prompt)
-        ])
+        ], Priority.FLOW)
         
         content = response.content.strip()
         if "OK" in content and len(content) < 10:
@@ -192,10 +510,10 @@ Pergunta do escritor:
 
 Analise usando raciocínio de árvore de pensamento."""
 
-        response = await self.gpt.ainvoke([
+        response = await self._invoke(self.gpt, [
             SystemMessage(content=self.prompts["gpt_structure"]),
             HumanMessage(content=prompt)
-        ])
+        ], Priority.DOUBT)
         
         return AnalysisResult(
             model="GPT-5.2 Thinking",
@@ -204,7 +522,41 @@ Analise usando raciocínio de árvore de pensamento."""
             suggestions=[]
         )
 
-    async def synthesize_responses(self, claude_resp: str, gemini_resp: str, gpt_resp: str) -> dict:
+    async def summarize_chapter(self, title: str, text: str) -> str:
+        """
+        Condenses a chapter into a short factual summary for manuscript context.
+        Gemini handles this (long context, cheapest of the three).
+        """
+        prompt = f"""Resuma o capítulo abaixo em no máximo 150 palavras, em português.
+Registre apenas fatos úteis para checar continuidade: personagens presentes, o que acontece, tempo, lugar, objetos e revelações importantes.
+
+CAPÍTULO: {title}
+
+{text}"""
+
+        response = await self._invoke(self.gemini, [
+            SystemMessage(content="Você é o arquivista do manuscrito. Seja factual e conciso."),
+            HumanMessage(content=prompt)
+        ], Priority.BATCH)
+        return response.content.strip()
+
+    async def summarize_project(self, chapter_summaries: list[str]) -> str:
+        """Rolls chapter summaries up into a summary of the whole manuscript."""
+        summaries = "\n\n".join(chapter_summaries)
+        prompt = f"""Abaixo estão os resumos dos capítulos de um romance, em ordem.
+
+{summaries}
+
+Escreva um resumo geral do projeto em no máximo 250 palavras: enredo até aqui, personagens principais e suas motivações, linhas do tempo e fios narrativos em aberto."""
+
+        response = await self._invoke(self.gemini, [
+            SystemMessage(content="Você é o arquivista do manuscrito. Seja factual e conciso."),
+            HumanMessage(content=prompt)
+        ], Priority.BATCH)
+        return response.content.strip()
+
+    async def synthesize_responses(self, claude_resp: str, gemini_resp: str, gpt_resp: str,
+                                   priority: Priority = Priority.POLISH) -> dict:
         """
         Consolidates the 3 opinions into a final verdict.
         """
@@ -232,15 +584,18 @@ Responda em JSON:
 }}
 """
         # Using GPT-4o for synthesis as it has strong reasoning capabilities
-        response = await self.gpt.ainvoke([
+        response = await self._invoke(self.gpt, [
             SystemMessage(content="Você é o Líder do Conselho Editorial. Sua função é sintetizar feedbacks."),
             HumanMessage(content=synthesis_prompt)
-        ])
-        
+        ], priority)
+        return self._parse_synthesis(response.content)
+
+    def _parse_synthesis(self, raw_content: str) -> dict:
+        """Extracts the consensus/divergence/verdict JSON from a synthesis reply."""
         import json
         import re
         try:
-            content = response.content.strip()
+            content = raw_content.strip()
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
             if json_match:
                 return json.loads(json_match.group(0))
@@ -257,7 +612,116 @@ Responda em JSON:
                 "verdict": f"Erro na síntese: {str(e)}"
             }
 
-    
+    async def presummarize_responses(self, responses: dict[str, str],
+                                     priority: Priority = Priority.POLISH) -> str:
+        """
+        Pipelined synthesis, step 1: drafts the final synthesis from the
+        critiques that already arrived while the slowest expert is still working.
+        """
+        critiques = "\n\n".join(
+            f"[{EXPERT_LABELS[name]}]:\n{content}" for name, content in responses.items()
+        )
+        prompt = f"""Abaixo estão as críticas de {len(responses)} especialistas sobre o mesmo texto. Um terceiro parecer ainda vai chegar.
+
+{critiques}
+
+TAREFA: Escreva o rascunho da síntese final a partir destas críticas:
+1. Consenso: Em que concordam?
+2. Divergência: Onde as opiniões se chocam?
+3. Veredito: Uma versão 'Final Combinada' que siga as sugestões de forma equilibrada.
+
+Responda em JSON:
+{{
+    "consensus": "...",
+    "divergence": "...",
+    "verdict": "..."
+}}
+"""
+        response = await self._invoke(self.gpt, [
+            SystemMessage(content="Você é o Líder do Conselho Editorial. Sua função é sintetizar feedbacks."),
+            HumanMessage(content=prompt)
+        ], priority)
+        return response.content
+
+    async def merge_synthesis(self, draft: str, last_name: str, last_resp: str,
+                              priority: Priority = Priority.POLISH) -> dict:
+        """
+        Pipelined synthesis, step 2: a short revision of the drafted synthesis
+        that folds in the last expert's critique.
+        """
+        prompt = f"""Rascunho da síntese, feito a partir dos primeiros especialistas:
+{draft}
+
+[{EXPERT_LABELS[last_name]}]:
+{last_resp}
+
+TAREFA: Revise o rascunho para incluir este último parecer. Mantenha o que continua válido e altere apenas o necessário no consenso, na divergência e no veredito.
+
+Responda em JSON:
+{{
+    "consensus": "...",
+    "divergence": "...",
+    "verdict": "..."
+}}
+"""
+        response = await self._invoke(self.gpt, [
+            SystemMessage(content="Você é o Líder do Conselho Editorial. Sua função é sintetizar feedbacks."),
+            HumanMessage(content=prompt)
+        ], priority)
+        return self._parse_synthesis(response.content)
+
+    async def _expert_analysis(self, llm, prompt_key: str, inputs: list[str], priority: Priority):
+        """
+        Runs one expert over its input(s).
+        Several inputs are chunks of a long text: they are analyzed in parallel
+        (map, bounded by the provider limit) and the partial findings are then
+        consolidated by the same expert (reduce).
+        """
+        if len(inputs) == 1:
+            return await self._invoke(llm, [
+                SystemMessage(content=self.prompts[prompt_key]),
+                HumanMessage(content=inputs[0])
+            ], priority)
+
+        total = len(inputs)
+        partials = await asyncio.gather(*(
+            self._invoke(llm, [
+                SystemMessage(content=self.prompts[prompt_key]),
+                HumanMessage(content=f"(Parte {i} de {total} de um capítulo longo)\n\n{chunk_input}")
+            ], priority)
+            for i, chunk_input in enumerate(inputs, start=1)
+        ))
+
+        findings = "\n\n".join(
+            f"[Parte {i}]:\n{partial.content}" for i, partial in enumerate(partials, start=1)
+        )
+        reduce_prompt = f"""Abaixo estão suas análises parciais de {total} partes consecutivas do mesmo capítulo.
+
+{findings}
+
+TAREFA: Consolide-as em uma única análise do capítulo inteiro, no mesmo formato de saída pedido.
+Elimine repetições, mantenha as observações mais importantes e aponte padrões que atravessam as partes."""
+
+        return await self._invoke(llm, [
+            SystemMessage(content=self.prompts[prompt_key]),
+            HumanMessage(content=reduce_prompt)
+        ], priority)
+
+    async def _timed_expert(self, name: str, call, started: float, timings: dict, latency_key: str) -> tuple:
+        """Awaits one expert call and records when it finished (ms since start)."""
+        response = await call
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        timings[f"{name}_ms"] = round(elapsed_ms, 1)
+        self._observe_latency(latency_key, elapsed_ms)
+        return name, response.content
+
+    async def _timed_step(self, latency_key: str, call):
+        """Awaits one synthesis step and records its duration."""
+        step_started = time.perf_counter()
+        result = await call
+        self._observe_latency(latency_key, (time.perf_counter() - step_started) * 1000)
+        return result
+
     async def polish_mode(self, 
                           text: str, 
                           manuscript_context: str,
@@ -265,67 +729,151 @@ Responda em JSON:
                           style_ref: str,
                           chapter: str,
                           scene: str,
-                          emotional_state: str) -> PolishReport:
+                          emotional_state: str,
+                          pipelined: bool = False,
+                          chunked: Optional[bool] = None,
+                          priority: Priority = Priority.POLISH) -> PolishReport:
         """
         POLISH MODE: Full multi-LLM comparison.
+
+        With pipelined=True, synthesis is drafted as soon as two experts have
+        answered, when past latencies say the draft will be ready before the
+        slowest expert; only a short merge then waits on it. Otherwise (or
+        until there are latencies to go by) synthesis runs as usual.
+
+        With chunked=True (automatic for long texts when None), each expert
+        analyzes scene/paragraph chunks in parallel and then reduces its own
+        findings before synthesis (map-reduce).
+
+        Batch jobs pass priority=Priority.BATCH so they never delay interactive work.
         """
+        started = time.perf_counter()
+        timings: dict[str, float] = {}
         
         # Generate the Briefing Header
         briefing = self.generate_context_package(project_name, style_ref, chapter, scene, emotional_state)
         
-        # Prepare specific inputs
-        claude_input = f"{briefing}\n\nTRECHO PARA ANÁLISE:\n{text}"
-        
-        gemini_input = f"{briefing}\n\nCONTEXTO GERAL:\n{manuscript_context}\n\nTRECHO PARA ANÁLISE:\n{text}"
-        
-        gpt_input = f"{briefing}\n\nTRECHO PARA ANÁLISE:\n{text}\n\n(Considere o que foi implícito mas não dito)"
-
-        # Run all three in parallel
-        claude_task = self.claude.ainvoke([
-            SystemMessage(content=self.prompts["claude_style"]),
-            HumanMessage(content=claude_input)
-        ])
-        gemini_task = self.gemini.ainvoke([
-            SystemMessage(content=self.prompts["gemini_coherence"]),
-            HumanMessage(content=gemini_input)
-        ])
-        gpt_task = self.gpt.ainvoke([
-            SystemMessage(content=self.prompts["gpt_structure"]),
-            HumanMessage(content=gpt_input)
-        ])
+        if chunked is None:
+            chunked = len(text.split()) > CHUNKED_THRESHOLD_WORDS
+        chunks = split_into_chunks(text, CHUNK_WORDS) if chunked else [text]
+
+        # Prepare specific inputs (per chunk; a single chunk is the whole text)
+        claude_inputs = [f"{briefing}\n\nTRECHO PARA ANÁLISE:\n{chunk}" for chunk in chunks]
         
-        claude_resp, gemini_resp, gpt_resp = await asyncio.gather(
-            claude_task, gemini_task, gpt_task
-        )
+        gemini_inputs = [f"{briefing}\n\nCONTEXTO GERAL:\n{manuscript_context}\n\nTRECHO PARA ANÁLISE:\n{chunk}" for chunk in chunks]
         
-        # Synthesis
-        synthesis = await self.synthesize_responses(claude_resp.content, gemini_resp.content, gpt_resp.content)
+        gpt_inputs = [f"{briefing}\n\nTRECHO PARA ANÁLISE:\n{chunk}\n\n(Considere o que foi implícito mas não dito)" for chunk in chunks]
+
+        # Run all three in parallel (cancelling this coroutine cancels all three calls)
+        claude_task = self._expert_analysis(self.claude, "claude_style", claude_inputs, priority)
+        gemini_task = self._expert_analysis(self.gemini, "gemini_coherence", gemini_inputs, priority)
+        gpt_task = self._expert_analysis(self.gpt, "gpt_structure", gpt_inputs, priority)
+        expert_calls = {
+            "claude_style": claude_task,
+            "gemini_coherence": gemini_task,
+            "gpt_structure": gpt_task,
+        }
+
+        # Expert latencies depend heavily on the map-reduce path
+        shape = "chunked" if chunked else "single"
+        if pipelined:
+            responses, synthesis = await self._pipelined_experts(expert_calls, started, timings, priority, shape)
+        else:
+            results = await asyncio.gather(*(
+                self._timed_expert(name, call, started, timings, f"{name}:{shape}")
+                for name, call in expert_calls.items()
+            ))
+            responses = dict(results)
+            timings["experts_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            synthesis = await self._full_synthesis(responses, priority)
+
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        timings["synthesis_ms"] = round(timings["total_ms"] - timings["experts_ms"], 1)
         
         # Build results
         return PolishReport(
             claude_style=AnalysisResult(
                 model="Claude 4.5 Sonnet",
                 focus="style",
-                analysis=claude_resp.content,
+                analysis=responses["claude_style"],
                 suggestions=[]
             ),
             gemini_coherence=AnalysisResult(
                 model="Gemini 3.0 Pro",
                 focus="coherence", 
-                analysis=gemini_resp.content,
+                analysis=responses["gemini_coherence"],
                 suggestions=[]
             ),
             gpt_structure=AnalysisResult(
                 model="GPT-5.2 Thinking",
                 focus="structure",
-                analysis=gpt_resp.content,
+                analysis=responses["gpt_structure"],
                 suggestions=[]
             ),
             consensus=synthesis.get("consensus", ""),
             divergence=synthesis.get("divergence", ""),
-            verdict=synthesis.get("verdict", "")
+            verdict=synthesis.get("verdict", ""),
+            timings=timings,
+            chunks=len(chunks),
         )
 
+    async def _full_synthesis(self, responses: dict, priority: Priority) -> dict:
+        return await self._timed_step("synthesis", self.synthesize_responses(
+            responses["claude_style"], responses["gemini_coherence"], responses["gpt_structure"],
+            priority
+        ))
+
+    def _draft_fits(self, last_name: str, shape: str, elapsed_ms: float) -> bool:
+        """
+        Whether a synthesis draft started now should be ready before the last
+        expert answers (no history yet: no). The draft is estimated from past
+        drafts, or from full syntheses before any draft ran.
+        """
+        last_expert_ms = self.latency_ms.get(f"{last_name}:{shape}")
+        draft_ms = self.latency_ms.get("draft", self.latency_ms.get("synthesis"))
+        if last_expert_ms is None or draft_ms is None:
+            return False
+        return elapsed_ms + draft_ms <= last_expert_ms
+
+    async def _pipelined_experts(self, expert_calls: dict, started: float, timings: dict,
+                                 priority: Priority, shape: str) -> tuple:
+        """
+        Runs the experts and, when it pays off, overlaps synthesis with the
+        slowest one: the first two critiques are drafted into a synthesis
+        while the third is pending, and only a short merge follows it.
+        """
+        pending = [
+            asyncio.ensure_future(self._timed_expert(name, call, started, timings, f"{name}:{shape}"))
+            for name, call in expert_calls.items()
+        ]
+        draft = None
+        responses: dict[str, str] = {}
+        try:
+            for next_done in asyncio.as_completed(pending):
+                name, content = await next_done
+                responses[name] = content
+                if len(responses) == len(expert_calls) - 1:
+                    last_name = next(key for key in expert_calls if key not in responses)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    if self._draft_fits(last_name, shape, elapsed_ms):
+                        timings["draft_started_ms"] = round(elapsed_ms, 1)
+                        draft = asyncio.ensure_future(
+                            self._timed_step("draft", self.presummarize_responses(dict(responses), priority))
+                        )
+            timings["experts_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+            if draft is None:
+                return responses, await self._full_synthesis(responses, priority)
+            notes = await draft
+            timings["draft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            synthesis = await self.merge_synthesis(notes, name, content, priority)
+            return responses, synthesis
+        finally:
+            # On failure or cancellation, don't leave provider calls running
+            for task in pending + ([draft] if draft else []):
+                if not task.done():
+                    task.cancel()
+
 
 # Singleton instance
 council = EditorialCouncil()
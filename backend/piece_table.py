@@ -0,0 +1,65 @@
+"""
+Piece table for applying a batch of edit operations to a long chapter.
+Edits only split/append small piece descriptors; the full text is
+materialized once at the end instead of being rebuilt after every op.
+"""
+
+from typing import List, Tuple
+
+ORIGINAL = 0
+ADDED = 1
+
+
+class PieceTable:
+    def __init__(self, text: str):
+        self._buffers = [text, ""]
+        self._added: List[str] = []
+        self._added_length = 0
+        # (buffer, start, length)
+        self._pieces: List[Tuple[int, int, int]] = [(ORIGINAL, 0, len(text))] if text else []
+        self.length = len(text)
+
+    def _split(self, pos: int) -> int:
+        """Ensures a piece boundary at pos and returns the index of the piece starting there."""
+        offset = 0
+        for index, (buffer, start, length) in enumerate(self._pieces):
+            if pos == offset:
+                return index
+            if pos < offset + length:
+                cut = pos - offset
+                self._pieces[index:index + 1] = [
+                    (buffer, start, cut),
+                    (buffer, start + cut, length - cut),
+                ]
+                return index + 1
+            offset += length
+        return len(self._pieces)
+
+    def insert(self, pos: int, text: str):
+        if not 0 <= pos <= self.length:
+            raise ValueError(f"Posição {pos} fora do texto (tamanho {self.length})")
+        if not text:
+            return
+        index = self._split(pos)
+        self._pieces.insert(index, (ADDED, self._added_length, len(text)))
+        self._added.append(text)
+        self._added_length += len(text)
+        self.length += len(text)
+
+    def delete(self, pos: int, length: int):
+        if length < 0 or not 0 <= pos or pos + length > self.length:
+            raise ValueError(f"Remoção [{pos}, {pos + length}) fora do texto (tamanho {self.length})")
+        if not length:
+            return
+        first = self._split(pos)
+        last = self._split(pos + length)
+        del self._pieces[first:last]
+        self.length -= length
+
+    def text(self) -> str:
+        if self._added:
+            self._buffers[ADDED] += "".join(self._added)
+            self._added = []
+        return "".join(
+            self._buffers[buffer][start:start + length] for buffer, start, length in self._pieces
+        )
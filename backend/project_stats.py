@@ -0,0 +1,179 @@
+"""
+Materialized project statistics.
+Each content write recomputes that chapter's stat row from its plain text and
+adds only the difference to the project rollup (UPDATE ... SET x = x + :dx),
+in the same transaction. Every field is an additive count, so the rollup is
+exact, and reading a project's totals is one primary-key lookup.
+The rollup row also carries the project's card list version, bumped by every
+write that changes a card, which the list ETag is built from.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, literal, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import ChapterStats, ProjectStats, UNASSIGNED_PROJECT
+from style_metrics import COUNT_FIELDS, style_counts
+
+# Fields summed into the project rollup
+STAT_FIELDS = ["word_count"] + COUNT_FIELDS
+
+# Silent reading speed used for the reading-time estimate
+READING_WORDS_PER_MINUTE = int(os.getenv("READING_WORDS_PER_MINUTE", "230"))
+
+REBUILD_BATCH = 200
+
+
+def project_key(project_id: Optional[int]) -> int:
+    return UNASSIGNED_PROJECT if project_id is None else project_id
+
+
+def chapter_values(plain_text: str, word_count: int) -> Dict[str, int]:
+    return {"word_count": word_count, **style_counts(plain_text or "")}
+
+
+async def _ensure_row(db: AsyncSession, project: int):
+    await db.execute(sqlite_insert(ProjectStats).values(project_id=project).on_conflict_do_nothing())
+
+
+async def _apply_delta(db: AsyncSession, project: int, delta: Dict[str, int], chapters: int):
+    await _ensure_row(db, project)
+    await db.execute(
+        update(ProjectStats)
+        .where(ProjectStats.project_id == project)
+        .values(
+            chapter_count=ProjectStats.chapter_count + chapters,
+            list_version=ProjectStats.list_version + 1,
+            updated_at=datetime.utcnow(),
+            **{name: getattr(ProjectStats, name) + delta[name] for name in STAT_FIELDS},
+        )
+    )
+
+
+# --- Write hooks (same transaction as the chapter write) ---
+
+async def record_chapter(db: AsyncSession, chapter_id: int, project_id: Optional[int],
+                         plain_text: str, word_count: int):
+    """
+    Refreshes a chapter's stat row and moves the rollup by the difference
+    (a chapter that changed project leaves its old rollup entirely).
+    """
+    values = await asyncio.to_thread(chapter_values, plain_text, word_count)
+    project = project_key(project_id)
+    row = await db.get(ChapterStats, chapter_id)
+    if row is not None and row.project_id != project:
+        await _apply_delta(db, row.project_id, {name: -getattr(row, name) for name in STAT_FIELDS}, -1)
+        await db.delete(row)
+        await db.flush()
+        row = None
+    if row is None:
+        db.add(ChapterStats(chapter_id=chapter_id, project_id=project, **values))
+        delta, added = values, 1
+    else:
+        delta = {name: values[name] - getattr(row, name) for name in STAT_FIELDS}
+        for name, value in values.items():
+            setattr(row, name, value)
+        added = 0
+    await _apply_delta(db, project, delta, added)
+
+
+async def record_chapters(db: AsyncSession, project_id: Optional[int], chapters: List[tuple]):
+    """Stat rows for bulk-created (chapter_id, plain_text, word_count) chapters, one rollup update."""
+    if not chapters:
+        return
+    project = project_key(project_id)
+    rows = await asyncio.to_thread(
+        lambda: [
+            {"chapter_id": chapter_id, "project_id": project, **chapter_values(plain_text, word_count)}
+            for chapter_id, plain_text, word_count in chapters
+        ]
+    )
+    await db.execute(insert(ChapterStats), rows)
+    delta = {name: sum(row[name] for row in rows) for name in STAT_FIELDS}
+    await _apply_delta(db, project, delta, len(rows))
+
+
+async def forget_chapter(db: AsyncSession, chapter_id: int):
+    row = await db.get(ChapterStats, chapter_id)
+    if row is None:
+        return
+    delta = {name: -getattr(row, name) for name in STAT_FIELDS}
+    project = row.project_id
+    await db.delete(row)
+    await _apply_delta(db, project, delta, -1)
+
+
+async def bump_list_versions(db: AsyncSession, project_ids: Optional[Iterable[Optional[int]]] = None):
+    """
+    For card writes that leave the stats alone (title, color, order): bumps
+    the list version of these projects, or of every project when None.
+    """
+    query = update(ProjectStats).values(list_version=ProjectStats.list_version + 1)
+    if project_ids is not None:
+        projects = {project_key(project_id) for project_id in project_ids}
+        if not projects:
+            return
+        for project in projects:
+            await _ensure_row(db, project)
+        query = query.where(ProjectStats.project_id.in_(projects))
+    await db.execute(query)
+
+
+async def get_list_version(db: AsyncSession, project_id: Optional[int]) -> tuple:
+    """Version of one project's card list, or of all chapters' (project_id None)."""
+    if project_id is None:
+        return tuple((await db.execute(
+            select(func.count(), func.sum(ProjectStats.list_version))
+        )).one())
+    return (await db.scalar(select(ProjectStats.list_version).where(ProjectStats.project_id == project_id)),)
+
+
+async def get_project_stats(db: AsyncSession, project_id: int) -> Optional[ProjectStats]:
+    return await db.get(ProjectStats, project_id)
+
+
+# --- Full rebuild (migrations, repair) ---
+
+def rebuild(conn: Connection):
+    """Recomputes every chapter stat row and the rollups from scratch."""
+    # Past every old list version, so no cached list ETag can match again
+    list_version = (conn.execute(select(func.max(ProjectStats.list_version))).scalar() or 0) + 1
+    conn.execute(ChapterStats.__table__.delete())
+    conn.execute(ProjectStats.__table__.delete())
+    last_id = 0
+    while True:
+        chapters = conn.execute(
+            text(
+                "SELECT id, project_id, plain_text, word_count FROM chapters "
+                "WHERE id > :last ORDER BY id LIMIT :limit"
+            ),
+            {"last": last_id, "limit": REBUILD_BATCH},
+        ).fetchall()
+        if not chapters:
+            break
+        conn.execute(insert(ChapterStats), [
+            {
+                "chapter_id": row.id,
+                "project_id": project_key(row.project_id),
+                **chapter_values(row.plain_text, row.word_count or 0),
+            }
+            for row in chapters
+        ])
+        last_id = chapters[-1].id
+
+    stats = ChapterStats.__table__.c
+    conn.execute(
+        insert(ProjectStats).from_select(
+            ["project_id", "chapter_count", "list_version", "updated_at"] + STAT_FIELDS,
+            select(
+                stats.project_id, func.count(), literal(list_version), func.datetime("now"),
+                *[func.sum(stats[name]) for name in STAT_FIELDS],
+            ).group_by(stats.project_id),
+        )
+    )
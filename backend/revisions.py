@@ -0,0 +1,224 @@
+"""
+Chapter revision history.
+Every save stores either a full snapshot or a compact delta against the
+previous stored revision, zstd-compressed. A snapshot is forced every
+SNAPSHOT_EVERY revisions, so rebuilding any revision applies a bounded
+chain of deltas. Background compaction thins out old revisions.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import zstandard
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import Chapter, ChapterRevision
+from piece_table import PieceTable
+
+# Max deltas between two snapshots (bounds reconstruction cost)
+SNAPSHOT_EVERY = int(os.getenv("REVISION_SNAPSHOT_EVERY", "20"))
+
+# Revisions younger than this are all kept; older ones are thinned to one per day
+REVISION_KEEP_ALL_DAYS = int(os.getenv("REVISION_KEEP_ALL_DAYS", "2"))
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+_compressor = zstandard.ZstdCompressor(level=9)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+# --- Encoding ---
+
+def diff_ops(old: str, new: str) -> List[list]:
+    """
+    Single replace op covering the changed span (common prefix/suffix trimmed).
+    Linear time, and autosaves usually touch one region, so the delta stays tiny.
+    """
+    if old == new:
+        return []
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return [[prefix, len(old) - prefix - suffix, new[prefix:len(new) - suffix]]]
+
+
+def apply_ops(text: str, ops: List[list]) -> str:
+    document = PieceTable(text)
+    for pos, length, text_in in ops:
+        if length:
+            document.delete(pos, length)
+        document.insert(pos, text_in)
+    return document.text()
+
+
+def encode_snapshot(text: str) -> bytes:
+    return _compressor.compress(text.encode("utf-8"))
+
+
+def encode_delta(ops: List[list]) -> bytes:
+    return _compressor.compress(json.dumps(ops, ensure_ascii=False).encode("utf-8"))
+
+
+def decode(row: ChapterRevision, previous: Optional[str]) -> str:
+    """Text of a stored revision, given the text of the stored revision before it."""
+    data = _decompressor.decompress(row.payload)
+    if row.kind == SNAPSHOT:
+        return data.decode("utf-8")
+    return apply_ops(previous or "", json.loads(data))
+
+
+# --- Request path (async) ---
+
+async def record(db: AsyncSession, chapter_id: int, revision: int,
+                 new_text: str, ops: Optional[List[list]] = None, old_text: Optional[str] = None):
+    """
+    Adds a revision row to the current transaction.
+    Pass the edit ops when known (delta saves), otherwise the previous text
+    to diff against. Falls back to a snapshot at the start of a chain.
+    A chapter with no history yet (saved before revisions existed) first gets
+    its previous text stored at revision - 1, so the first save doesn't lose it.
+    """
+    last_snapshot = await db.scalar(
+        select(func.max(ChapterRevision.revision)).where(
+            ChapterRevision.chapter_id == chapter_id, ChapterRevision.kind == SNAPSHOT
+        )
+    )
+    if last_snapshot is None and old_text is not None and revision > 0:
+        last_snapshot = revision - 1
+        db.add(ChapterRevision(
+            chapter_id=chapter_id, revision=last_snapshot, kind=SNAPSHOT, payload=encode_snapshot(old_text)
+        ))
+    chain_full = last_snapshot is None or revision - last_snapshot >= SNAPSHOT_EVERY
+    if chain_full or (ops is None and old_text is None):
+        kind, payload = SNAPSHOT, encode_snapshot(new_text)
+    else:
+        kind = DELTA
+        payload = encode_delta(ops if ops is not None else diff_ops(old_text, new_text))
+    db.add(ChapterRevision(chapter_id=chapter_id, revision=revision, kind=kind, payload=payload))
+
+
+async def record_snapshots(db: AsyncSession, chapters: List[tuple]):
+    """Initial (revision 0) snapshots for bulk-created (chapter_id, text) pairs."""
+    if chapters:
+        await db.execute(insert(ChapterRevision), [
+            {"chapter_id": chapter_id, "revision": 0, "kind": SNAPSHOT, "payload": encode_snapshot(text)}
+            for chapter_id, text in chapters
+        ])
+
+
+async def list_revisions(db: AsyncSession, chapter_id: int) -> list:
+    result = await db.execute(
+        select(
+            ChapterRevision.revision, ChapterRevision.kind, ChapterRevision.created_at,
+            func.length(ChapterRevision.payload).label("size"),
+        )
+        .where(ChapterRevision.chapter_id == chapter_id)
+        .order_by(ChapterRevision.revision.desc())
+    )
+    return result.all()
+
+
+async def reconstruct(db: AsyncSession, chapter_id: int, revision: int) -> Optional[tuple]:
+    """
+    (revision, text, created_at) of the chapter as of `revision`: the nearest
+    snapshot at or before it plus the deltas after it. If that revision was
+    compacted away, the returned revision is the stored one that was rebuilt
+    (the latest kept before it). None if nothing is stored.
+    """
+    base = await db.scalar(
+        select(func.max(ChapterRevision.revision)).where(
+            ChapterRevision.chapter_id == chapter_id,
+            ChapterRevision.kind == SNAPSHOT,
+            ChapterRevision.revision <= revision,
+        )
+    )
+    if base is None:
+        return None
+    result = await db.execute(
+        select(ChapterRevision)
+        .where(
+            ChapterRevision.chapter_id == chapter_id,
+            ChapterRevision.revision >= base,
+            ChapterRevision.revision <= revision,
+        )
+        .order_by(ChapterRevision.revision)
+    )
+    rebuilt, text, created_at = None, None, None
+    for row in result.scalars():
+        text = decode(row, text)
+        rebuilt, created_at = row.revision, row.created_at
+    return rebuilt, text, created_at
+
+
+async def forget(db: AsyncSession, chapter_id: int):
+    await db.execute(delete(ChapterRevision).where(ChapterRevision.chapter_id == chapter_id))
+
+
+# --- Background compaction (sync) ---
+
+def kept_revisions(rows: List[ChapterRevision], now: datetime) -> set:
+    """Keeps everything recent, the last revision of each older day, and the latest."""
+    cutoff = now - timedelta(days=REVISION_KEEP_ALL_DAYS)
+    keep = {rows[-1].revision}
+    last_per_day = {}
+    for row in rows:
+        if row.created_at >= cutoff:
+            keep.add(row.revision)
+        else:
+            last_per_day[row.created_at.date()] = row.revision
+    keep.update(last_per_day.values())
+    return keep
+
+
+def compact_chapter(db: Session, chapter_id: int, now: Optional[datetime] = None) -> int:
+    """
+    Thins a chapter's history and re-encodes the surviving chain (each delta
+    must be relative to the previous *stored* revision). Returns rows removed.
+    """
+    rows = (
+        db.query(ChapterRevision)
+        .filter(ChapterRevision.chapter_id == chapter_id)
+        .order_by(ChapterRevision.revision)
+        .all()
+    )
+    if not rows:
+        return 0
+    keep = kept_revisions(rows, now or datetime.utcnow())
+    if len(keep) == len(rows):
+        return 0
+
+    text, kept_text, since_snapshot, removed = None, None, 0, 0
+    for row in rows:
+        text = decode(row, text)
+        if row.revision not in keep:
+            db.delete(row)
+            removed += 1
+            continue
+        if kept_text is None or since_snapshot + 1 >= SNAPSHOT_EVERY:
+            row.kind, row.payload, since_snapshot = SNAPSHOT, encode_snapshot(text), 0
+        else:
+            row.kind, row.payload = DELTA, encode_delta(diff_ops(kept_text, text))
+            since_snapshot += 1
+        kept_text = text
+    db.commit()
+    return removed
+
+
+def compact_all(db: Session) -> int:
+    """Compacts every chapter and drops history of deleted chapters."""
+    removed = db.query(ChapterRevision).filter(
+        ~ChapterRevision.chapter_id.in_(db.query(Chapter.id))
+    ).delete(synchronize_session=False)
+    db.commit()
+    for (chapter_id,) in db.query(ChapterRevision.chapter_id).distinct().all():
+        removed += compact_chapter(db, chapter_id)
+    return removed
@@ -0,0 +1,72 @@
+"""
+API Routes for local (non-LLM) manuscript analysis.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models import Chapter
+from style_metrics import analyze_style
+
+router = APIRouter(prefix="/analysis", tags=["analysis"])
+
+
+class StyleRequest(BaseModel):
+    # Either raw text (HTML or plain) or a stored chapter
+    text: Optional[str] = None
+    chapter_id: Optional[int] = None
+
+
+class MetricCheck(BaseModel):
+    metric: str
+    value: float
+    min: Optional[float]
+    max: Optional[float]
+    status: str  # "ok", "low" or "high" against the style_dna.md profile
+
+
+class LazyAdjective(BaseModel):
+    word: str
+    count: int
+
+
+class StyleReport(BaseModel):
+    word_count: int
+    sentence_count: int
+    metrics: Dict[str, float]
+    sentence_histogram: Dict[str, int]  # Sentence length bucket (words) -> sentences
+    lazy_adjectives: List[LazyAdjective]
+    checks: List[MetricCheck]
+    score: float  # Share of profile checks that pass
+    elapsed_ms: float
+
+
+@router.post("/style", response_model=StyleReport)
+async def analyze_chapter_style(request: StyleRequest, db: AsyncSession = Depends(get_async_db)):
+    """Measures the text against the style_dna.md target profile (no LLM call)"""
+    if request.text is not None:
+        text = request.text
+    elif request.chapter_id is not None:
+        text = await db.scalar(select(Chapter.plain_text).where(Chapter.id == request.chapter_id))
+        if text is None:
+            raise HTTPException(status_code=404, detail="Capítulo não encontrado")
+    else:
+        raise HTTPException(status_code=400, detail="Envie um texto ou um chapter_id")
+
+    result = await asyncio.to_thread(analyze_style, text)
+    return StyleReport(
+        word_count=result.word_count,
+        sentence_count=result.sentence_count,
+        metrics=result.metrics,
+        sentence_histogram=result.sentence_histogram,
+        lazy_adjectives=[LazyAdjective(word=word, count=count) for word, count in result.lazy_adjectives],
+        checks=[MetricCheck(**check) for check in result.checks],
+        score=result.score,
+        elapsed_ms=result.elapsed_ms,
+    )
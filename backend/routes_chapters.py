@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import base64
+import binascii
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import case, delete, func, select, true, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 
-from database import get_db
-from models import Chapter
+from database import get_async_db, get_async_write_db
+import etags
+import fast_json
+from models import Chapter, ChapterSummary, Analysis, ORDER_GAP, UNASSIGNED_PROJECT, project_scope
+from piece_table import PieceTable
+import project_stats
+import revisions
+import search_index
+from summaries import same_project, summary_service
+from text_utils import UTF16_PAIR_RE, count_words, from_utf16_units, get_preview, strip_html, to_utf16_units
 
 router = APIRouter(prefix="/chapters", tags=["chapters"])
 
@@ -30,6 +42,7 @@ class ChapterResponse(BaseModel):
     content: str
     order: int
     word_count: int
+    revision: int
     color: Optional[str]
     created_at: datetime
     updated_at: datetime
@@ -53,112 +66,449 @@ class ChapterCard(BaseModel):
         from_attributes = True
 
 
+CARD_COLUMNS = (
+    Chapter.id, Chapter.title, Chapter.order, Chapter.word_count,
+    Chapter.color, Chapter.preview, Chapter.updated_at,
+)
+CARD_FIELDS = {column.key: column for column in CARD_COLUMNS}
+
+# Largest page of cards a client can ask for
+MAX_PAGE_SIZE = 500
+
+
 class ReorderRequest(BaseModel):
     chapter_ids: List[int]  # IDs in desired order
 
 
-# Helper function
-def count_words(text: str) -> int:
-    return len(text.split()) if text else 0
+class MoveRequest(BaseModel):
+    after_id: Optional[int] = None  # Place right after this chapter (None = first)
+
+
+class EditOp(BaseModel):
+    """
+    Delete `delete` chars at `pos`, then insert `insert` there. Offsets are
+    UTF-16 code units, like JS string indices (an emoji counts as 2).
+    """
+    pos: int
+    delete: int = 0
+    insert: str = ""
+
+
+class EditOpsRequest(BaseModel):
+    base_revision: int
+    ops: List[EditOp]  # Applied in sequence, each against the result of the previous
+
+
+class EditOpsResponse(BaseModel):
+    id: int
+    revision: int
+    word_count: int
+    updated_at: datetime
+
+
+class RevisionInfo(BaseModel):
+    revision: int
+    kind: str  # "snapshot" or "delta"
+    created_at: datetime
+    size: int  # Stored (compressed) bytes
+
+
+class RevisionContent(BaseModel):
+    revision: int
+    content: str
+    created_at: datetime
+
+
+def content_fields(content: str) -> dict:
+    """Every column derived from a chapter's content, computed once per write."""
+    plain_text = strip_html(content)
+    return {
+        "content": content,
+        "plain_text": plain_text,
+        "word_count": count_words(plain_text),
+        "preview": get_preview(plain_text),
+    }
+
+
+def stale_revision(current: int) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={"message": "Revisão desatualizada", "revision": current},
+    )
+
+
+async def next_order(db: AsyncSession, project_id: int) -> int:
+    """Order key after the project's last card (MAX answered from ix_chapters_project_order)."""
+    last = await db.scalar(select(func.max(Chapter.order)).where(project_scope(project_id)))
+    return (last or 0) + ORDER_GAP
+
+
+def encode_cursor(order: int, chapter_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{order}:{chapter_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        order, chapter_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        return int(order), int(chapter_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
 
+def selected_fields(fields: Optional[str]) -> List[str]:
+    if fields is None:
+        return list(CARD_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CARD_FIELDS]
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"Campos desconhecidos: {', '.join(unknown)}")
+    return names
 
-def get_preview(content: str, max_chars: int = 100) -> str:
-    if not content:
-        return ""
-    clean = content.replace('\n', ' ').strip()
-    if len(clean) <= max_chars:
-        return clean
-    return clean[:max_chars].rsplit(' ', 1)[0] + "..."
+
+async def rebalance_order(db: AsyncSession):
+    """
+    Respaces all order keys to ORDER_GAP multiples (per project) in one statement.
+    Needed once neighbours get so close no integer is left between them.
+    """
+    ranked = select(
+        Chapter.id,
+        func.row_number().over(
+            partition_by=Chapter.project_id, order_by=(Chapter.order, Chapter.id)
+        ).label("position"),
+    ).subquery()
+    position = select(ranked.c.position).where(ranked.c.id == Chapter.id).scalar_subquery()
+    await db.execute(update(Chapter).values(order=position * ORDER_GAP))
+
+
+def chapter_etag(chapter_id: int, revision: int, order: int) -> str:
+    # Every content/title/color write bumps revision; moves only change order
+    return etags.make_etag("chapter", chapter_id, revision, order)
+
+
+def list_scope(project_id: Optional[int]):
+    """Filter for the card list: one project, or every chapter when omitted."""
+    return project_scope(project_id) if project_id is not None else true()
+
+
+async def list_etag(db: AsyncSession, project_id: Optional[int], *page) -> str:
+    """Validator for a card list page: the list version (one primary-key lookup) and the page."""
+    version = await project_stats.get_list_version(db, project_id)
+    return etags.make_etag("chapters", project_id, *page, *version)
 
 
 # Routes
 @router.get("", response_model=List[ChapterCard])
-def list_chapters(db: Session = Depends(get_db)):
-    """List all chapters as cards (minimal data for sidebar)"""
-    chapters = db.query(Chapter).order_by(Chapter.order).all()
-    return [
-        ChapterCard(
-            id=ch.id,
-            title=ch.title,
-            order=ch.order,
-            word_count=ch.word_count,
-            color=ch.color,
-            preview=get_preview(ch.content),
-            updated_at=ch.updated_at
-        )
-        for ch in chapters
-    ]
+async def list_chapters(
+    project_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List chapters as cards (minimal data for sidebar): one project's with
+    `project_id` (0 = chapters without a project), all of them without it.
+    With `limit`, returns one keyset page and the cursor of the next one in
+    the X-Next-Cursor header; `fields` (comma-separated) trims each card.
+    """
+    names = selected_fields(fields)
+    etag = await list_etag(db, project_id, limit, cursor, fields)
+    if etags.none_match(if_none_match, etag):
+        return etags.not_modified(etag)
 
+    # Card columns only: content is never loaded for the listing
+    query = (
+        select(*[CARD_FIELDS[name] for name in names], Chapter.id.label("_id"), Chapter.order.label("_order"))
+        .where(list_scope(project_id))
+        .order_by(Chapter.order, Chapter.id)
+    )
+    if cursor is not None:
+        query = query.where(tuple_(Chapter.order, Chapter.id) > decode_cursor(cursor))
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = (await db.execute(query)).all()
 
-@router.get("/{chapter_id}", response_model=ChapterResponse)
-def get_chapter(chapter_id: int, db: Session = Depends(get_db)):
-    """Get full chapter content"""
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1]._order, rows[-1]._id)
+    # Rows come from our own columns: encoded as-is, without a ChapterCard pass
+    response = fast_json.json_response(
+        [{name: row._mapping[name] for name in names} for row in rows], headers
+    )
+    etags.set_etag(response, etag)
+    return response
+
+
+async def get_chapter_or_404(db: AsyncSession, chapter_id: int) -> Chapter:
+    chapter = await db.get(Chapter, chapter_id)
     if not chapter:
         raise HTTPException(status_code=404, detail="Capítulo não encontrado")
     return chapter
 
 
+@router.get("/{chapter_id}", response_model=ChapterResponse)
+async def get_chapter(
+    chapter_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get full chapter content (304 if the client's copy is current)"""
+    if if_none_match:
+        # Validator columns only: an unchanged chapter never loads its content
+        row = (await db.execute(
+            select(Chapter.revision, Chapter.order).where(Chapter.id == chapter_id)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Capítulo não encontrado")
+        etag = chapter_etag(chapter_id, row.revision, row.order)
+        if etags.none_match(if_none_match, etag):
+            return etags.not_modified(etag)
+    chapter = await get_chapter_or_404(db, chapter_id)
+    response = fast_json.orm_response(chapter, ChapterResponse)
+    etags.set_etag(response, chapter_etag(chapter.id, chapter.revision, chapter.order))
+    return response
+
+
 @router.post("", response_model=ChapterResponse)
-def create_chapter(chapter: ChapterCreate, db: Session = Depends(get_db)):
+async def create_chapter(chapter: ChapterCreate, db: AsyncSession = Depends(get_async_write_db)):
     """Create a new chapter"""
-    # Get max order
-    max_order = db.query(Chapter).count()
-    
+    # Append after the project's last card
     db_chapter = Chapter(
         title=chapter.title,
-        content=chapter.content or "",
         project_id=chapter.project_id,
         color=chapter.color,
-        order=max_order,
-        word_count=count_words(chapter.content or "")
+        order=await next_order(db, chapter.project_id or UNASSIGNED_PROJECT),
+        **content_fields(chapter.content or "")
     )
     db.add(db_chapter)
-    db.commit()
-    db.refresh(db_chapter)
-    return db_chapter
+    await db.flush()
+    await revisions.record(db, db_chapter.id, 0, db_chapter.content)
+    await search_index.index_chapter(db, db_chapter.id, db_chapter.plain_text)
+    await project_stats.record_chapter(
+        db, db_chapter.id, db_chapter.project_id, db_chapter.plain_text, db_chapter.word_count
+    )
+    await db.commit()
+    await db.refresh(db_chapter)
+    summary_service.schedule_chapter(db_chapter.id)
+    return fast_json.orm_response(db_chapter, ChapterResponse)
 
 
 @router.put("/{chapter_id}", response_model=ChapterResponse)
-def update_chapter(chapter_id: int, update: ChapterUpdate, db: Session = Depends(get_db)):
-    """Update chapter (used for saving)"""
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Capítulo não encontrado")
+async def update_chapter(
+    chapter_id: int,
+    update: ChapterUpdate,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_write_db),
+):
+    """Update chapter (used for saving); If-Match rejects writes over a stale copy with 412"""
+    chapter = await get_chapter_or_404(db, chapter_id)
+    current_etag = chapter_etag(chapter.id, chapter.revision, chapter.order)
+    if not etags.match(if_match, current_etag):
+        raise etags.precondition_failed(current_etag)
+    content_changed = update.content is not None and update.content != chapter.content
+    old_content = chapter.content
     
     if update.title is not None:
         chapter.title = update.title
     if update.content is not None:
-        chapter.content = update.content
-        chapter.word_count = count_words(update.content)
+        for column, value in content_fields(update.content).items():
+            setattr(chapter, column, value)
     if update.color is not None:
         chapter.color = update.color
     
+    chapter.revision += 1
     chapter.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(chapter)
-    return chapter
+    if content_changed:
+        await revisions.record(db, chapter.id, chapter.revision, chapter.content, old_text=old_content)
+    if content_changed or update.title is not None:
+        await db.flush()
+        await search_index.index_chapter(db, chapter.id, chapter.plain_text)
+    if content_changed:
+        await project_stats.record_chapter(
+            db, chapter.id, chapter.project_id, chapter.plain_text, chapter.word_count
+        )
+    else:
+        await project_stats.bump_list_versions(db, [chapter.project_id])
+    await db.commit()
+    await db.refresh(chapter)
+    if update.content is not None:
+        summary_service.schedule_chapter(chapter.id)
+    response = fast_json.orm_response(chapter, ChapterResponse)
+    etags.set_etag(response, chapter_etag(chapter.id, chapter.revision, chapter.order))
+    return response
+
+
+@router.patch("/{chapter_id}/ops", response_model=EditOpsResponse)
+async def apply_chapter_ops(chapter_id: int, request: EditOpsRequest, db: AsyncSession = Depends(get_async_write_db)):
+    """
+    Delta save: applies position-based edit ops against base_revision.
+    A stale base is rejected with 409 (and the current revision) before the
+    content is even read, so the client can resync with a full GET.
+    """
+    current = await db.scalar(select(Chapter.revision).where(Chapter.id == chapter_id))
+    if current is None:
+        raise HTTPException(status_code=404, detail="Capítulo não encontrado")
+    if current != request.base_revision:
+        raise stale_revision(current)
+
+    content, project_id = (await db.execute(
+        select(Chapter.content, Chapter.project_id).where(Chapter.id == chapter_id)
+    )).one()
+    content = content or ""
+    # Offsets are UTF-16 units; they only differ from code points past an astral char
+    astral = UTF16_PAIR_RE.search(content) is not None or any(UTF16_PAIR_RE.search(op.insert) for op in request.ops)
+    document = PieceTable(to_utf16_units(content) if astral else content)
+    try:
+        for op in request.ops:
+            if op.delete:  # Pure inserts: insert() checks pos and reports it
+                document.delete(op.pos, op.delete)
+            document.insert(op.pos, to_utf16_units(op.insert) if astral else op.insert)
+        new_content = from_utf16_units(document.text()) if astral else document.text()
+    except UnicodeError:
+        raise HTTPException(status_code=400, detail="Edição deixa um par substituto UTF-16 incompleto")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    fields = content_fields(new_content)
+    now = datetime.utcnow()
+    # Conditional write: loses cleanly to a concurrent save of the same base
+    result = await db.execute(
+        update(Chapter)
+        .where(Chapter.id == chapter_id, Chapter.revision == request.base_revision)
+        .values(**fields, revision=request.base_revision + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        current = await db.scalar(select(Chapter.revision).where(Chapter.id == chapter_id))
+        raise stale_revision(current)
+    await revisions.record(
+        db, chapter_id, request.base_revision + 1, fields["content"],
+        # Stored deltas use code point offsets: re-diffed when the request's differ
+        ops=None if astral else [[op.pos, op.delete, op.insert] for op in request.ops], old_text=content,
+    )
+    await search_index.index_chapter(db, chapter_id, fields["plain_text"])
+    await project_stats.record_chapter(db, chapter_id, project_id, fields["plain_text"], fields["word_count"])
+    await db.commit()
+    summary_service.schedule_chapter(chapter_id)
+    return EditOpsResponse(
+        id=chapter_id,
+        revision=request.base_revision + 1,
+        word_count=fields["word_count"],
+        updated_at=now,
+    )
+
+
+@router.get("/{chapter_id}/revisions", response_model=List[RevisionInfo])
+async def list_chapter_revisions(chapter_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Stored revisions of a chapter, newest first"""
+    rows = await revisions.list_revisions(db, chapter_id)
+    return [RevisionInfo(**row._mapping) for row in rows]
+
+
+async def get_revision_or_404(db: AsyncSession, chapter_id: int, revision: int) -> tuple:
+    found = await revisions.reconstruct(db, chapter_id, revision)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Revisão não encontrada")
+    return found
+
+
+@router.get("/{chapter_id}/revisions/{revision}", response_model=RevisionContent)
+async def get_chapter_revision(chapter_id: int, revision: int, db: AsyncSession = Depends(get_async_db)):
+    """Chapter content as of a given revision"""
+    rebuilt, content, created_at = await get_revision_or_404(db, chapter_id, revision)
+    return RevisionContent(revision=rebuilt, content=content, created_at=created_at)
+
+
+@router.post("/{chapter_id}/revisions/{revision}/restore", response_model=ChapterResponse)
+async def restore_chapter_revision(
+    chapter_id: int,
+    revision: int,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_write_db),
+):
+    """Restore an old revision (saved as a new revision, so it can be undone too)"""
+    chapter = await get_chapter_or_404(db, chapter_id)
+    _, content, _ = await get_revision_or_404(db, chapter_id, revision)
+    return await update_chapter(
+        chapter.id, ChapterUpdate(content=content), if_match=if_match, db=db
+    )
 
 
 @router.delete("/{chapter_id}")
-def delete_chapter(chapter_id: int, db: Session = Depends(get_db)):
+async def delete_chapter(chapter_id: int, db: AsyncSession = Depends(get_async_write_db)):
     """Delete a chapter"""
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Capítulo não encontrado")
+    chapter = await get_chapter_or_404(db, chapter_id)
     
-    db.delete(chapter)
-    db.commit()
+    project_id = chapter.project_id
+    await db.execute(delete(ChapterSummary).where(ChapterSummary.chapter_id == chapter_id))
+    await db.execute(delete(Analysis).where(Analysis.chapter_id == chapter_id))
+    await revisions.forget(db, chapter_id)
+    await search_index.remove_chapter(db, chapter_id)
+    await project_stats.forget_chapter(db, chapter_id)
+    await db.delete(chapter)
+    await db.commit()
+    summary_service.schedule_project(project_id)
     return {"message": "Capítulo removido"}
 
 
 @router.patch("/reorder")
-def reorder_chapters(request: ReorderRequest, db: Session = Depends(get_db)):
+async def reorder_chapters(request: ReorderRequest, db: AsyncSession = Depends(get_async_write_db)):
     """Reorder chapters by providing list of IDs in desired order"""
-    for idx, chapter_id in enumerate(request.chapter_ids):
-        chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
-        if chapter:
-            chapter.order = idx
+    if request.chapter_ids:
+        # Single set-based UPDATE; also respaces the keys of the listed chapters
+        new_order = case(
+            {chapter_id: (idx + 1) * ORDER_GAP for idx, chapter_id in enumerate(request.chapter_ids)},
+            value=Chapter.id,
+        )
+        await db.execute(
+            update(Chapter).where(Chapter.id.in_(request.chapter_ids)).values(order=new_order)
+        )
+        project_ids = await db.scalars(
+            select(Chapter.project_id).where(Chapter.id.in_(request.chapter_ids)).distinct()
+        )
+        await project_stats.bump_list_versions(db, project_ids.all())
     
-    db.commit()
+    await db.commit()
     return {"message": "Capítulos reordenados"}
+
+
+@router.patch("/{chapter_id}/move")
+async def move_chapter(chapter_id: int, request: MoveRequest, db: AsyncSession = Depends(get_async_write_db)):
+    """Move one chapter right after another (drag-and-drop); updates a single row"""
+    chapter = await get_chapter_or_404(db, chapter_id)
+    # Order keys are only compared within the chapter's own project
+    in_project = same_project(Chapter.project_id, chapter.project_id)
+
+    for attempt in range(2):
+        if request.after_id is None:
+            lower = None
+        else:
+            lower = await db.scalar(select(Chapter.order).where(Chapter.id == request.after_id, in_project))
+            if lower is None:
+                raise HTTPException(status_code=404, detail="Capítulo de referência não encontrado")
+        upper_query = select(func.min(Chapter.order)).where(Chapter.id != chapter_id, in_project)
+        if lower is not None:
+            upper_query = upper_query.where(Chapter.order > lower)
+        upper = await db.scalar(upper_query)
+
+        if lower is None and upper is None:
+            new_order = ORDER_GAP
+        elif lower is None:
+            new_order = upper - ORDER_GAP
+        elif upper is None:
+            new_order = lower + ORDER_GAP
+        else:
+            new_order = (lower + upper) // 2
+
+        if new_order != lower and new_order != upper:
+            break
+        # Neighbours are adjacent integers: respace everything and retry once
+        await rebalance_order(db)
+
+    chapter.order = new_order
+    # A rebalance moved cards of every project
+    await project_stats.bump_list_versions(db, [chapter.project_id] if attempt == 0 else None)
+    await db.commit()
+    return {"message": "Capítulo movido", "order": new_order}
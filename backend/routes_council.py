@@ -2,84 +2,256 @@
 API Routes for the Editorial Council (Tripartite Intelligence).
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import math
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
-from orchestrator import council, ActivationMode, ConsistencyAlert, AnalysisResult, PolishReport
+import analysis_store
+import fast_json
+from database import SessionLocal, WriteSessionLocal
+from orchestrator import council, ActivationMode, ConsistencyAlert, AnalysisResult, PolishReport, Priority
+from flow_throttle import flow_throttle
+from summaries import summary_service
 
 router = APIRouter(prefix="/council", tags=["Editorial Council"])
 
+# How often an in-flight council request checks whether its client went away
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Non-standard "Client Closed Request" status (nginx convention)
+CLIENT_CLOSED_REQUEST = 499
+
 
 class FlowRequest(BaseModel):
     current_text: str
-    manuscript_context: str
+    # Empty: built from the cached chapter/project summaries
+    manuscript_context: str = ""
+    # Identify the editor session/chapter so newer checks supersede older ones
+    session_id: Optional[str] = None
+    chapter_id: Optional[int] = None
+
+    def session_key(self) -> Optional[str]:
+        if self.session_id is None and self.chapter_id is None:
+            return None
+        return f"{self.session_id or 'default'}:{self.chapter_id}"
 
 
 class DoubtRequest(BaseModel):
     question: str
     text_context: str
+    # When set, the result is stored and reused for identical requests
+    chapter_id: Optional[int] = None
 
 
 class PolishRequest(BaseModel):
     text: str
-    manuscript_context: str
+    # Empty: built from the cached chapter/project summaries
+    manuscript_context: str = ""
+    # When set, the report is stored and reused for identical requests
+    chapter_id: Optional[int] = None
     # Context specific fields for the Prompt Map
     project_name: str = "Projeto Sem Nome"
     style_ref: str = "Metamodernismo"
     chapter: str = "1"
     scene: str = "1"
     emotional_state: str = "Neutro"
+    # Start synthesis before the slowest expert finishes
+    pipelined: bool = False
+    # Map-reduce over chunks of a long text (None = automatic by length)
+    chunked: Optional[bool] = None
+    # Background/batch job: runs behind interactive work
+    batch: bool = False
+
+
+class AnalysisRecord(BaseModel):
+    id: int
+    mode: str
+    content_hash: str
+    prompt_version: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StoredAnalysis(AnalysisRecord):
+    result: dict
+
+
+def _find_analysis(chapter_id: int, key: str, mode: str) -> Optional[dict]:
+    with SessionLocal() as db:
+        return analysis_store.find(db, chapter_id, key, mode, council.prompt_version)
+
+
+def _save_analysis(chapter_id: int, key: str, mode: str, result: dict):
+    with WriteSessionLocal() as db:
+        analysis_store.save(db, chapter_id, key, mode, council.prompt_version, result)
+
+
+async def resolve_context(manuscript_context: str, chapter_id: Optional[int]) -> str:
+    """Uses the client's context if given, otherwise the cached summaries."""
+    if manuscript_context.strip():
+        return manuscript_context
+    return await summary_service.build_context(chapter_id)
+
+
+async def run_until_disconnect(http_request: Request, coro):
+    """
+    Awaits a council coroutine, cancelling it (and every provider call it is
+    waiting on) as soon as the HTTP client disconnects.
+    Returns a 499 response when the work was abandoned.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                council.cancellation_stats["disconnected_requests"] += 1
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
 
 
 @router.post("/flow", response_model=Optional[ConsistencyAlert])
-async def flow_mode(request: FlowRequest):
+async def flow_mode(request: FlowRequest, http_request: Request):
     """
     FLOW MODE: Passive Gemini monitoring.
     Returns None if no issues, or a ConsistencyAlert if problem detected.
+    A newer request for the same session/chapter makes this one return None.
+    Checks arriving inside the chapter's adaptive window get a 202 "deferred"
+    response with a Retry-After instead of a Gemini call.
     """
+    session_key = request.session_key()
+    if session_key is not None:
+        retry_after = flow_throttle.admit(session_key, request.current_text)
+        if retry_after is not None:
+            return JSONResponse(
+                status_code=202,
+                content={"deferred": True, "retry_after": round(retry_after, 1)},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
     try:
-        alert = await council.flow_mode(
+        manuscript_context = await resolve_context(request.manuscript_context, request.chapter_id)
+        alert = await run_until_disconnect(http_request, council.flow_mode(
             current_text=request.current_text,
-            manuscript_context=request.manuscript_context
-        )
-        return alert
+            manuscript_context=manuscript_context,
+            session_key=session_key
+        ))
+        if session_key is not None and not isinstance(alert, Response):
+            flow_throttle.record_result(session_key, alerted=alert is not None)
+        return alert if isinstance(alert, Response) else fast_json.model_response(alert)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/doubt", response_model=AnalysisResult)
-async def doubt_mode(request: DoubtRequest):
+async def doubt_mode(request: DoubtRequest, http_request: Request):
     """
     DOUBT MODE: GPT-led structural analysis.
     For when the writer has a specific question.
     """
     try:
-        result = await council.doubt_mode(
+        if request.chapter_id is not None:
+            key = analysis_store.input_hash(request.text_context, request.question)
+            stored = await asyncio.to_thread(_find_analysis, request.chapter_id, key, ActivationMode.DOUBT.value)
+            if stored is not None:
+                return fast_json.json_response(stored)
+
+        result = await run_until_disconnect(http_request, council.doubt_mode(
             question=request.question,
             text_context=request.text_context
-        )
-        return result
+        ))
+        if request.chapter_id is not None and isinstance(result, AnalysisResult):
+            await asyncio.to_thread(_save_analysis, request.chapter_id, key, ActivationMode.DOUBT.value, result.model_dump())
+        return result if isinstance(result, Response) else fast_json.model_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/polish", response_model=PolishReport)
-async def polish_mode(request: PolishRequest):
+async def polish_mode(request: PolishRequest, http_request: Request):
     """
     POLISH MODE: Full multi-LLM analysis.
     All three AIs analyze in parallel, results synthesized.
     """
     try:
-        report = await council.polish_mode(
+        manuscript_context = await resolve_context(request.manuscript_context, request.chapter_id)
+        if request.chapter_id is not None:
+            key = analysis_store.input_hash(
+                request.text, manuscript_context, request.project_name, request.style_ref,
+                request.chapter, request.scene, request.emotional_state
+            )
+            stored = await asyncio.to_thread(_find_analysis, request.chapter_id, key, ActivationMode.POLISH.value)
+            if stored is not None:
+                # The stored timings are the original run's, not this response's
+                return fast_json.json_response({**stored, "timings": None, "cached": True})
+
+        report = await run_until_disconnect(http_request, council.polish_mode(
             text=request.text,
-            manuscript_context=request.manuscript_context,
+            manuscript_context=manuscript_context,
             project_name=request.project_name,
             style_ref=request.style_ref,
             chapter=request.chapter,
             scene=request.scene,
-            emotional_state=request.emotional_state
-        )
-        return report
+            emotional_state=request.emotional_state,
+            pipelined=request.pipelined,
+            chunked=request.chunked,
+            priority=Priority.BATCH if request.batch else Priority.POLISH
+        ))
+        if request.chapter_id is not None and isinstance(report, PolishReport):
+            await asyncio.to_thread(_save_analysis, request.chapter_id, key, ActivationMode.POLISH.value, report.model_dump())
+        return report if isinstance(report, Response) else fast_json.model_response(report)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analyses", response_model=List[AnalysisRecord])
+async def list_analyses(chapter_id: int, mode: Optional[ActivationMode] = None, limit: int = 20):
+    """Past analyses of a chapter, newest first (metadata only)."""
+    def query():
+        with SessionLocal() as db:
+            return analysis_store.list_for_chapter(db, chapter_id, mode.value if mode else None, limit)
+    rows = await asyncio.to_thread(query)
+    return [AnalysisRecord.model_validate(row) for row in rows]
+
+
+@router.get("/analyses/{analysis_id}", response_model=StoredAnalysis)
+async def get_analysis(analysis_id: int):
+    """A stored analysis with its full (decompressed) result."""
+    def query():
+        with SessionLocal() as db:
+            row = analysis_store.get(db, analysis_id)
+            if row is None:
+                return None
+            return StoredAnalysis(
+                id=row.id,
+                mode=row.mode,
+                content_hash=row.content_hash,
+                prompt_version=row.prompt_version,
+                created_at=row.created_at,
+                result=analysis_store.decompress(row.payload),
+            )
+    stored = await asyncio.to_thread(query)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Análise não encontrada")
+    return fast_json.model_response(stored)
+
+
+@router.get("/stats")
+async def council_stats():
+    """Runtime counters: cancelled work, in-flight and throttled flow checks."""
+    return {**council.get_stats(), "flow_throttle": flow_throttle.get_stats()}
@@ -0,0 +1,221 @@
+"""
+API Routes for whole-project operations (export, import, stats).
+Project 0 addresses the chapters that don't belong to any project.
+"""
+
+import re
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+from urllib.parse import quote
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal, async_write_session, get_async_db
+from exporters import EXPORTERS
+from importers import ManuscriptSplitter
+from models import Chapter, Project, ORDER_GAP, UNASSIGNED_PROJECT, project_scope
+import project_stats
+import revisions
+from routes_chapters import content_fields, next_order
+import search_index
+from style_metrics import COUNT_FIELDS, compare_to_profile, metrics_from_counts
+from summaries import summary_service
+
+router = APIRouter(prefix="/projects", tags=["projects"])
+
+UNASSIGNED_TITLE = "Manuscrito"
+
+# Chapters fetched per round trip while streaming (bounds memory to a few chapters)
+EXPORT_FETCH_ROWS = 4
+
+FILENAME_UNSAFE_RE = re.compile(r"[^\w-]+")
+
+# Imported chapters are staged and inserted in batches of this many (bounds memory)
+IMPORT_BATCH_CHAPTERS = 20
+
+# Staged import batches stay in memory up to this many bytes, then go to a temp file
+IMPORT_SPOOL_BYTES = 4 * 1024 * 1024
+
+
+class ProjectStatsResponse(BaseModel):
+    project_id: int
+    chapter_count: int
+    word_count: int
+    reading_minutes: float
+    metrics: Dict[str, float]  # Whole-book style metrics (see style_metrics)
+    style_score: float  # Share of style_dna.md profile checks that pass
+    updated_at: Optional[datetime]
+
+
+class ImportedChapter(BaseModel):
+    id: int
+    title: str
+    word_count: int
+
+
+class ImportResponse(BaseModel):
+    imported: int
+    word_count: int
+    chapters: List[ImportedChapter]
+
+
+async def project_title_or_404(db: AsyncSession, project_id: int) -> str:
+    if project_id == UNASSIGNED_PROJECT:
+        return UNASSIGNED_TITLE
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    return project.title or UNASSIGNED_TITLE
+
+
+async def stream_chapters(project_id: int):
+    """
+    (title, content) in reading order from a server-side cursor.
+    Owns its session: the response body is produced after the request's
+    dependencies have been torn down.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(Chapter.title, Chapter.content)
+            .where(project_scope(project_id))
+            .order_by(Chapter.order, Chapter.id)
+            .execution_options(yield_per=EXPORT_FETCH_ROWS)
+        )
+        async for title, content in result:
+            yield title or "", content or ""
+
+
+@router.get("/{project_id}/export")
+async def export_project(
+    project_id: int,
+    format: Literal["markdown", "html", "epub"] = "markdown",
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Streams the whole manuscript in reading order (Markdown, HTML or EPUB)"""
+    title = await project_title_or_404(db, project_id)
+    exporter, media_type, extension = EXPORTERS[format]
+    slug = FILENAME_UNSAFE_RE.sub("-", title).strip("-") or "manuscrito"
+    filename = f"{slug}.{extension}"
+    return StreamingResponse(
+        exporter(title, stream_chapters(project_id)),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"},
+    )
+
+
+def chapter_rows(project_id: int, chapters: list) -> list:
+    """Insert rows (all but the order key) for (title, content) pairs, derived columns included."""
+    return [
+        {
+            "title": title,
+            "project_id": None if project_id == UNASSIGNED_PROJECT else project_id,
+            "revision": 0,
+            **content_fields(content),
+        }
+        for title, content in chapters
+    ]
+
+
+async def insert_chapters(db: AsyncSession, rows: list, first_order: int) -> list:
+    """Bulk-inserts chapter rows with their order keys, history and search rows."""
+    for index, row in enumerate(rows):
+        row["order"] = first_order + index * ORDER_GAP
+    result = await db.execute(
+        insert(Chapter).returning(Chapter.id, sort_by_parameter_order=True), rows
+    )
+    ids = result.scalars().all()
+    await revisions.record_snapshots(db, [(chapter_id, row["content"]) for chapter_id, row in zip(ids, rows)])
+    await search_index.index_chapters(
+        db, [(chapter_id, row["title"], row["plain_text"]) for chapter_id, row in zip(ids, rows)]
+    )
+    await project_stats.record_chapters(
+        db, rows[0]["project_id"],
+        [(chapter_id, row["plain_text"], row["word_count"]) for chapter_id, row in zip(ids, rows)],
+    )
+    return [
+        ImportedChapter(id=chapter_id, title=row["title"], word_count=row["word_count"])
+        for chapter_id, row in zip(ids, rows)
+    ]
+
+
+@router.post("/{project_id}/import", response_model=ImportResponse)
+async def import_manuscript(
+    project_id: int,
+    request: Request,
+    format: Literal["markdown", "text", "html"] = "markdown",
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Imports a whole manuscript sent as the raw request body, appended after
+    the existing chapters. Chapters are split off while the upload streams
+    in and staged in batches (one JSON line each) in a spool file, without
+    holding the write lock (a slow upload would stall every other save);
+    then the batches are read back one at a time and inserted in one short
+    transaction (all or nothing). Only one batch is held in memory.
+    """
+    await project_title_or_404(db, project_id)
+    await db.rollback()  # No read snapshot held open during the upload
+
+    splitter = ManuscriptSplitter(format)
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        batch: list = []
+        staged = 0
+
+        def stage(chapters: list):
+            nonlocal staged
+            spool.write(orjson.dumps(chapter_rows(project_id, chapters)) + b"\n")
+            staged += len(chapters)
+
+        async for data in request.stream():
+            batch.extend(splitter.feed(data))
+            if len(batch) >= IMPORT_BATCH_CHAPTERS:
+                stage(batch)
+                batch = []
+        batch.extend(splitter.close())
+        if batch:
+            stage(batch)
+        if not staged:
+            raise HTTPException(status_code=400, detail="Nenhum texto encontrado no arquivo")
+
+        spool.seek(0)
+        imported: List[ImportedChapter] = []
+        async with async_write_session() as write_db:
+            first_order = await next_order(write_db, project_id)
+            for line in spool:
+                rows = orjson.loads(line)
+                imported.extend(await insert_chapters(write_db, rows, first_order + len(imported) * ORDER_GAP))
+            await write_db.commit()
+
+    for chapter in imported:
+        summary_service.schedule_chapter(chapter.id)
+    return ImportResponse(
+        imported=len(imported),
+        word_count=sum(chapter.word_count for chapter in imported),
+        chapters=imported,
+    )
+
+
+@router.get("/{project_id}/stats", response_model=ProjectStatsResponse)
+async def get_project_stats(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Project totals and style metrics from the materialized rollup (no chapter is read)"""
+    await project_title_or_404(db, project_id)
+    row = await project_stats.get_project_stats(db, project_id)
+    counts = {name: getattr(row, name) if row else 0 for name in COUNT_FIELDS}
+    metrics = metrics_from_counts(counts)
+    checks = compare_to_profile(metrics)
+    word_count = row.word_count if row else 0
+    return ProjectStatsResponse(
+        project_id=project_id,
+        chapter_count=row.chapter_count if row else 0,
+        word_count=word_count,
+        reading_minutes=round(word_count / project_stats.READING_WORDS_PER_MINUTE, 1),
+        metrics=metrics,
+        style_score=round(sum(check["status"] == "ok" for check in checks) / len(checks), 3),
+        updated_at=row.updated_at if row else None,
+    )
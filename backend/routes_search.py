@@ -0,0 +1,34 @@
+"""
+API Routes for manuscript search.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+import search_index
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+class SearchHit(BaseModel):
+    chapter_id: int
+    title: str
+    order: int
+    score: float  # Higher is better
+    snippet: str  # Plain-text excerpt around the best match
+    highlights: List[List[int]]  # [start, end) offsets of matched terms in the snippet
+
+
+@router.get("", response_model=List[SearchHit])
+async def search_chapters(
+    q: str = Query(..., min_length=1, max_length=200),
+    project_id: Optional[int] = None,  # 0 = chapters without a project, omitted = all
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Accent-insensitive full-text search over chapter titles and text"""
+    return await search_index.search(db, q, project_id=project_id, limit=limit)
@@ -2,10 +2,16 @@
 """
 ZenWriter Backend - Standalone Entry Point
 This script is used by PyInstaller to create a standalone executable.
+
+--profile-startup (or ZENWRITER_PROFILE_STARTUP=1) reports per-module import
+times, lifespan phase timings and the time until /health first answers.
 """
+import logging
 import os
 import sys
-import uvicorn
+import threading
+import time
+import urllib.request
 
 # Add the backend directory to path for imports
 if getattr(sys, 'frozen', False):
@@ -16,30 +22,64 @@ else:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Set the data directory for SQLite database
-DATA_DIR = os.path.expanduser("~/Library/Application Support/ZenWriter")
+DATA_DIR = os.environ.get("ZENWRITER_DATA_DIR") or os.path.expanduser("~/Library/Application Support/ZenWriter")
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # Set environment variable for database path
 os.environ["ZENWRITER_DATA_DIR"] = DATA_DIR
 
+PORT = int(os.environ.get("ZENWRITER_PORT", "8001"))
+
+if "--profile-startup" in sys.argv:
+    os.environ["ZENWRITER_PROFILE_STARTUP"] = "1"
+
 # Change to backend directory for relative imports
 os.chdir(BASE_DIR)
 sys.path.insert(0, BASE_DIR)
 
+# Before any other import, so uvicorn and the app are timed too
+import startup_profile
+
+if startup_profile.PROFILE_STARTUP:
+    startup_profile.install_import_timer()
+    # Phases that finish after the report (deferred work) are logged as they end
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+
+import uvicorn
+
+
+def report_when_ready():
+    """Polls /health, then prints the startup profile (profile mode only)."""
+    url = f"http://127.0.0.1:{PORT}/health"
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                response.read()
+            break
+        except OSError:
+            time.sleep(0.01)
+    print(f"First /health answered {startup_profile.since_launch():.2f}s after launch")
+    print(startup_profile.report())
+
+
 def main():
     """Start the FastAPI server."""
     print(f"ZenWriter Backend starting...")
     print(f"Data directory: {DATA_DIR}")
     print(f"Base directory: {BASE_DIR}")
-    
+
     # Import here after path setup
-    from main import app
-    
+    with startup_profile.phase("import app"):
+        from main import app
+
+    if startup_profile.PROFILE_STARTUP:
+        threading.Thread(target=report_when_ready, daemon=True).start()
+
     # Run uvicorn
     uvicorn.run(
         app,
         host="127.0.0.1",
-        port=8001,
+        port=PORT,
         log_level="info",
     )
 
@@ -0,0 +1,143 @@
+"""
+Full-text search over chapters (SQLite FTS5).
+chapters_fts holds each chapter's title and plain text under the chapter id
+as rowid. It is kept in sync by the chapter write routes, inside the same
+transaction as the write. unicode61 with remove_diacritics folds accents, so
+"coracao" finds "coração".
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import column, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Chapter, project_scope
+
+FTS_TABLE = "chapters_fts"
+
+FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, body, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# Column weights for bm25(): a title hit outranks a body hit
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+# Tokens of context around a hit in the snippet
+SNIPPET_TOKENS = 24
+
+# Control characters never typed in prose, used to locate highlights in snippets
+HIGHLIGHT_OPEN = "\x02"
+HIGHLIGHT_CLOSE = "\x03"
+
+QUERY_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+fts_table = table(FTS_TABLE, column("rowid"))
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turns free user input into a safe FTS5 MATCH expression: every word must
+    appear (implicit AND), the last one as a prefix so results follow typing.
+    Quotes, operators and other FTS5 syntax in the input are neutralized.
+    """
+    tokens = QUERY_TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def split_highlights(marked: str) -> tuple:
+    """Removes highlight markers from a snippet; returns (text, [[start, end], ...])."""
+    parts, highlights, length, start = [], [], 0, None
+    for piece in re.split(f"([{HIGHLIGHT_OPEN}{HIGHLIGHT_CLOSE}])", marked):
+        if piece == HIGHLIGHT_OPEN:
+            start = length
+        elif piece == HIGHLIGHT_CLOSE:
+            if start is not None:
+                highlights.append([start, length])
+            start = None
+        else:
+            parts.append(piece)
+            length += len(piece)
+    return "".join(parts), highlights
+
+
+# --- Write hooks (call after the chapter row is flushed) ---
+
+async def index_chapter(db: AsyncSession, chapter_id: int, plain_text: str):
+    """(Re)indexes a chapter; the title is read from the (flushed) chapter row."""
+    await remove_chapter(db, chapter_id)
+    await db.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, body) SELECT id, title, :body FROM chapters WHERE id = :id"),
+        {"id": chapter_id, "body": plain_text or ""},
+    )
+
+
+async def index_chapters(db: AsyncSession, chapters: List[tuple]):
+    """Indexes bulk-created (chapter_id, title, plain_text) rows in one statement."""
+    if chapters:
+        await db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (:id, :title, :body)"),
+            [{"id": chapter_id, "title": title, "body": plain_text or ""}
+             for chapter_id, title, plain_text in chapters],
+        )
+
+
+async def remove_chapter(db: AsyncSession, chapter_id: int):
+    await db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": chapter_id})
+
+
+# --- Query ---
+
+async def search(db: AsyncSession, query: str, project_id: Optional[int] = None, limit: int = 20) -> List[dict]:
+    """Ranked hits (best first) with a snippet of the body and highlight offsets into it."""
+    match = build_match_query(query)
+    if match is None:
+        return []
+    # Rank first: bm25() is cheap, snippet() re-tokenizes the whole chapter,
+    # so snippets are only built for the hits actually returned
+    score = literal_column(f"bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT})").label("score")
+    ranked_query = (
+        select(Chapter.id, Chapter.title, Chapter.order, score)
+        .select_from(fts_table.join(Chapter, Chapter.id == fts_table.c.rowid))
+        .where(text(f"{FTS_TABLE} MATCH :match").bindparams(match=match))
+        .order_by(score)
+        .limit(limit)
+    )
+    if project_id is not None:
+        ranked_query = ranked_query.where(project_scope(project_id))
+    ranked = (await db.execute(ranked_query)).all()
+    if not ranked:
+        return []
+
+    ids = [row.id for row in ranked]
+    placeholders = ", ".join(f":id{index}" for index in range(len(ids)))
+    snippets = dict((await db.execute(
+        text(
+            f"SELECT rowid, snippet({FTS_TABLE}, 1, :open, :close, '…', {SNIPPET_TOKENS}) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match AND rowid IN ({placeholders})"
+        ),
+        {
+            "match": match, "open": HIGHLIGHT_OPEN, "close": HIGHLIGHT_CLOSE,
+            **{f"id{index}": chapter_id for index, chapter_id in enumerate(ids)},
+        },
+    )).all())
+
+    hits = []
+    for row in ranked:
+        snippet, highlights = split_highlights(snippets.get(row.id) or "")
+        hits.append({
+            "chapter_id": row.id,
+            "title": row.title,
+            "order": row.order,
+            # bm25() is lower-is-better; flip it so clients sort descending
+            "score": -row.score,
+            "snippet": snippet,
+            "highlights": highlights,
+        })
+    return hits
@@ -0,0 +1,110 @@
+"""
+Startup instrumentation for the desktop sidecar.
+With ZENWRITER_PROFILE_STARTUP=1 (run_backend.py --profile-startup) every
+module import is timed, like `python -X importtime`, which a frozen
+PyInstaller build can't be given. Lifespan phases are always timed (two
+perf_counter calls each) and are logged in profile mode.
+"""
+
+import importlib.abc
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+PROFILE_STARTUP = os.getenv("ZENWRITER_PROFILE_STARTUP", "") not in ("", "0")
+
+# Reference point for "time since launch" (this module is imported first)
+PROCESS_STARTED = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+# (module, cumulative seconds, self seconds), in completion order
+_imports: List[Tuple[str, float, float]] = []
+# (phase, seconds)
+_phases: List[Tuple[str, float]] = []
+
+
+def since_launch() -> float:
+    return time.perf_counter() - PROCESS_STARTED
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta path entry that lets the real finders locate each module, then
+    wraps its loader's exec_module to time it. Nested imports run inside the
+    parent's exec_module, so self time is cumulative minus the children's.
+    """
+
+    def __init__(self):
+        self._children = [0.0]  # Child time accumulated per open import
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                self._wrap(spec.loader)
+                return spec
+        return None
+
+    def _wrap(self, loader):
+        # Class-level loaders (builtins, frozen) are shared and cheap: left alone
+        if loader is None or isinstance(loader, type) or getattr(loader, "_timed", False):
+            return
+        exec_module = getattr(loader, "exec_module", None)
+        if exec_module is None:
+            return
+
+        def timed_exec_module(module):
+            self._children.append(0.0)
+            started = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = self._children.pop()
+                self._children[-1] += elapsed
+                _imports.append((module.__name__, elapsed, elapsed - children))
+
+        try:
+            loader.exec_module = timed_exec_module
+            loader._timed = True
+        except AttributeError:
+            pass  # Loader with __slots__: not timed
+
+
+def install_import_timer():
+    if not any(isinstance(finder, ImportTimer) for finder in sys.meta_path):
+        sys.meta_path.insert(0, ImportTimer())
+
+
+@contextmanager
+def phase(name: str):
+    """Times one startup phase."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _phases.append((name, elapsed))
+        if PROFILE_STARTUP:
+            logger.info("Startup phase %s: %.1f ms (%.2f s since launch)", name, elapsed * 1000, since_launch())
+
+
+def get_phases() -> List[Tuple[str, float]]:
+    return list(_phases)
+
+
+def report(top: int = 25) -> str:
+    """Slowest imports (by cumulative time) and the lifespan phases so far."""
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for name, cumulative, own in sorted(_imports, key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"{cumulative * 1000:>14.1f} {own * 1000:>9.1f}  {name}")
+    lines.append(f"{len(_imports)} modules, {sum(own for _, _, own in _imports) * 1000:.0f} ms importing")
+    for name, elapsed in _phases:
+        lines.append(f"phase {name}: {elapsed * 1000:.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,322 @@
+"""
+Local style metrics, measured against the traits style_dna.md prescribes:
+long cumulative sentences, subordination, colon/semicolon rhythm, few
+("lazy") adjectives, no melodrama, a hesitant self-correcting narrator.
+The text is tokenized once into NumPy arrays (token kind, word code,
+sentence id); every metric is then an array reduction, so a full chapter
+takes milliseconds and no LLM call.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from text_utils import strip_html
+
+# --- Lexicons (lemmas; inflected forms are generated below) ---
+
+# Purely descriptive adjectives style_dna.md calls "preguiçosos"
+LAZY_ADJECTIVES = [
+    "bonito", "lindo", "belo", "feio", "rápido", "lento", "assustador", "horrível", "terrível",
+    "incrível", "maravilhoso", "triste", "feliz", "alegre", "grande", "pequeno", "enorme",
+    "imenso", "bom", "mau", "ruim", "legal", "ótimo", "péssimo", "perfeito", "especial",
+    "interessante", "estranho", "normal", "forte", "fraco", "escuro", "claro", "pesado", "leve",
+    "frio", "quente", "velho", "novo", "lindíssimo", "maravilhosíssimo", "sombrio", "misterioso",
+    "profundo", "intenso", "suave", "doce", "amargo", "brilhante", "tenebroso", "aterrorizante",
+    "magnífico", "fantástico", "espetacular", "sensacional", "adorável", "encantador", "fofo",
+]
+
+# Other common adjectives: count toward the overall adjective ratio only
+ADJECTIVES = LAZY_ADJECTIVES + [
+    "alto", "baixo", "largo", "estreito", "longo", "curto", "cheio", "vazio", "limpo", "sujo",
+    "seco", "molhado", "duro", "macio", "liso", "áspero", "calmo", "nervoso", "cansado",
+    "tranquilo", "silencioso", "barulhento", "antigo", "moderno", "recente", "jovem", "rico",
+    "pobre", "caro", "barato", "fácil", "difícil", "simples", "complexo", "possível",
+    "impossível", "provável", "necessário", "importante", "principal", "único", "comum", "raro",
+    "óbvio", "evidente", "exato", "preciso", "vago", "distante", "próximo", "íntimo",
+    "público", "privado", "humano", "político", "social", "cultural", "histórico", "pessoal",
+    "natural", "artificial", "real", "verdadeiro", "falso", "sincero", "honesto", "cruel",
+    "gentil", "amável", "generoso", "egoísta", "orgulhoso", "humilde", "tímido", "corajoso",
+    "medroso", "ansioso", "angustiado", "aflito", "sereno", "melancólico", "nostálgico",
+    "irônico", "cínico", "ingênuo", "inteligente", "estúpido", "sábio", "louco", "lúcido",
+    "confuso", "nítido", "opaco", "transparente", "branco", "preto", "negro", "vermelho",
+    "azul", "verde", "amarelo", "cinza", "cinzento", "dourado", "pálido", "vivo", "morto",
+    "doente", "saudável", "sozinho", "inteiro", "vasto", "minúsculo", "pedagógico",
+    "arquitetônico", "clínico", "abstrato", "concreto", "frágil", "precário", "provisório",
+    "absurdo", "ridículo", "banal", "trivial", "solene", "grave", "sutil",
+]
+
+# Subordinating conjunctions and relative pronouns (one per subordinate clause, roughly)
+SUBORDINATORS = {
+    "que", "quando", "enquanto", "porque", "embora", "conquanto", "se", "caso", "onde",
+    "cujo", "cuja", "cujos", "cujas", "qual", "quais", "quanto", "conforme", "porquanto",
+    "como", "contanto", "consoante",
+}
+
+INTENSIFIERS = {
+    "muito", "muita", "muitos", "muitas", "extremamente", "terrivelmente", "profundamente",
+    "absolutamente", "completamente", "totalmente", "incrivelmente", "demais", "tão", "tanto",
+    "tanta", "super", "mega", "intensamente", "perdidamente", "desesperadamente", "jamais",
+}
+
+# The skeptical narrator's hedges and self-corrections (style_dna.md, section 4)
+HESITATION_WORDS = {"talvez", "provavelmente", "possivelmente", "aparentemente", "suponho", "acho"}
+HESITATION_BIGRAMS = [("ou", "melhor"), ("quer", "dizer"), ("isto", "é"), ("se", "é"), ("ou", "seja")]
+
+# Target profile: (min, max) per metric, None = unbounded
+TARGET_PROFILE: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+    "mean_sentence_words": (20.0, 45.0),
+    "long_sentence_share": (0.25, None),      # Sentences with >= 30 words
+    "short_sentence_share": (None, 0.20),     # Sentences with <= 8 words
+    "sentence_length_cv": (0.45, None),       # Rhythm variation (std / mean)
+    "clauses_per_sentence": (1.8, None),
+    "semicolons_colons_per_100_words": (0.4, None),
+    "commas_per_sentence": (2.0, None),
+    "adjective_ratio": (None, 0.06),
+    "lazy_adjective_ratio": (None, 0.005),
+    "exclamation_share": (None, 0.02),
+    "intensifier_ratio": (None, 0.008),
+    "hesitations_per_1000_words": (1.0, None),
+}
+
+LONG_SENTENCE_WORDS = 30
+SHORT_SENTENCE_WORDS = 8
+HISTOGRAM_EDGES = [1, 6, 11, 21, 31, 51, 10 ** 6]  # Sentence length buckets (words)
+
+
+# Lemmas the suffix rules in _inflections would get wrong
+IRREGULAR_INFLECTIONS = {
+    "bom": ["bom", "boa", "bons", "boas"],
+    "mau": ["mau", "má", "maus", "más"],
+}
+
+# A written accent off the last syllable: -il/-el is unstressed (frágil, amável)
+ACCENTED_RE = re.compile(r"[áéíóúâêô]")
+
+
+def _inflections(lemma: str) -> List[str]:
+    """Gender/number forms of a Portuguese adjective lemma."""
+    if lemma in IRREGULAR_INFLECTIONS:
+        return list(IRREGULAR_INFLECTIONS[lemma])
+    if lemma.endswith("o"):
+        stem = lemma[:-1]
+        return [lemma, stem + "a", stem + "os", stem + "as"]
+    if lemma.endswith("or"):
+        return [lemma, lemma + "a", lemma + "es", lemma + "as"]
+    if lemma.endswith("el"):
+        # amável -> amáveis, cruel -> cruéis
+        unstressed = ACCENTED_RE.search(lemma[:-2])
+        return [lemma, lemma[:-2] + ("eis" if unstressed else "éis")]
+    if lemma.endswith("al") or lemma.endswith("ul"):
+        return [lemma, lemma[:-1] + "is"]
+    if lemma.endswith("il"):
+        # frágil -> frágeis, gentil -> gentis
+        unstressed = ACCENTED_RE.search(lemma[:-2])
+        return [lemma, lemma[:-2] + ("eis" if unstressed else "is")]
+    if lemma.endswith("m"):
+        return [lemma, lemma[:-1] + "ns"]
+    if lemma.endswith(("z", "r")):
+        return [lemma, lemma + "es"]
+    if lemma.endswith("s"):
+        return [lemma]  # Unstressed -s: invariable
+    return [lemma, lemma + "s"]
+
+
+LAZY_ADJECTIVE_FORMS = {form for lemma in LAZY_ADJECTIVES for form in _inflections(lemma)}
+ADJECTIVE_FORMS = {form for lemma in ADJECTIVES for form in _inflections(lemma)}
+
+# --- Tokenizer ---
+
+WORD, PERIOD, EXCLAIM, QUESTION, ELLIPSIS, PARAGRAPH, COMMA, SEMICOLON, COLON, DASH = range(10)
+SENTENCE_ENDS = [PERIOD, EXCLAIM, QUESTION, ELLIPSIS, PARAGRAPH]
+
+TOKEN_RE = re.compile(
+    r"([^\W\d_]+(?:[-'’][^\W\d_]+)*|\d+(?:[.,]\d+)*)"  # Word (hyphenated, with apostrophes) or number
+    r"|(\.\.\.|…|[.!?;:,—–])"                          # Punctuation that shapes rhythm
+    r"|(\n\s*\n)"                                       # Paragraph break (ends a sentence too)
+)
+PUNCTUATION_KINDS = {
+    ".": PERIOD, "!": EXCLAIM, "?": QUESTION, "...": ELLIPSIS, "…": ELLIPSIS,
+    ",": COMMA, ";": SEMICOLON, ":": COLON, "—": DASH, "–": DASH,
+}
+
+
+@dataclass
+class Tokens:
+    kinds: np.ndarray        # Token kind per token
+    sentence: np.ndarray     # Sentence id per token
+    word_codes: np.ndarray   # Vocabulary code per word
+    vocabulary: List[str]    # Code -> word
+
+
+def tokenize(text: str) -> Tokens:
+    kinds: List[int] = []
+    words: List[str] = []
+    for word, punctuation, paragraph in TOKEN_RE.findall(text):
+        if word:
+            kinds.append(WORD)
+            words.append(word.lower())
+        elif punctuation:
+            kinds.append(PUNCTUATION_KINDS[punctuation])
+        else:
+            kinds.append(PARAGRAPH)
+    kinds_array = np.array(kinds, dtype=np.int8)
+    # A sentence-ending token closes its own sentence; the next one starts after it
+    ends = np.isin(kinds_array, SENTENCE_ENDS)
+    sentence = np.concatenate(([0], np.cumsum(ends)[:-1])) if len(kinds) else np.zeros(0, dtype=np.int64)
+    vocabulary: Dict[str, int] = {}
+    codes = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for word in words), dtype=np.int64, count=len(words))
+    return Tokens(kinds_array, sentence, codes, list(vocabulary))
+
+
+# --- Metrics ---
+
+# Additive counts behind every ratio metric. Sums of these are valid for any
+# set of chapters, so project rollups can be kept by applying per-save deltas.
+COUNT_FIELDS = [
+    "words", "sentences", "sentence_words_sq", "long_sentences", "short_sentences",
+    "commas", "semicolons_colons", "dashes", "questions", "subordinators", "adjectives",
+    "lazy_adjectives", "exclamation_sentences", "intensifiers", "hesitations",
+]
+
+
+@dataclass
+class StyleMetrics:
+    word_count: int
+    sentence_count: int
+    counts: Dict[str, int]
+    metrics: Dict[str, float]
+    sentence_histogram: Dict[str, int]
+    lazy_adjectives: List[Tuple[str, int]]
+    checks: List[dict] = field(default_factory=list)
+    score: float = 0.0
+    elapsed_ms: float = 0.0
+
+
+def _lexicon_mask(vocabulary: List[str], lexicon: set) -> np.ndarray:
+    return np.fromiter((word in lexicon for word in vocabulary), dtype=bool, count=len(vocabulary))
+
+
+def metrics_from_counts(counts: Dict[str, int]) -> Dict[str, float]:
+    """Ratio metrics from additive counts (one chapter or a whole project)."""
+    sentences = max(counts["sentences"], 1)
+    words = max(counts["words"], 1)
+    mean_length = counts["words"] / sentences if counts["sentences"] else 0.0
+    variance = max(counts["sentence_words_sq"] / sentences - mean_length ** 2, 0.0)
+    metrics = {
+        "mean_sentence_words": mean_length,
+        "long_sentence_share": counts["long_sentences"] / sentences,
+        "short_sentence_share": counts["short_sentences"] / sentences,
+        "sentence_length_cv": variance ** 0.5 / mean_length if mean_length else 0.0,
+        "clauses_per_sentence": 1.0 + (counts["subordinators"] + counts["semicolons_colons"]) / sentences,
+        "commas_per_sentence": counts["commas"] / sentences,
+        "semicolons_colons_per_100_words": 100.0 * counts["semicolons_colons"] / words,
+        "dashes_per_100_words": 100.0 * counts["dashes"] / words,
+        "adjective_ratio": counts["adjectives"] / words,
+        "lazy_adjective_ratio": counts["lazy_adjectives"] / words,
+        "exclamation_share": counts["exclamation_sentences"] / sentences,
+        "question_share": counts["questions"] / sentences,
+        "intensifier_ratio": counts["intensifiers"] / words,
+        "hesitations_per_1000_words": 1000.0 * counts["hesitations"] / words,
+    }
+    return {name: round(value, 4) for name, value in metrics.items()}
+
+
+def compute_metrics(tokens: Tokens) -> StyleMetrics:
+    kinds, codes = tokens.kinds, tokens.word_codes
+    is_word = kinds == WORD
+
+    # Words per sentence; sentences made only of punctuation ("?!", blank paragraphs) are dropped
+    per_sentence = np.bincount(tokens.sentence[is_word], minlength=int(tokens.sentence.max(initial=-1)) + 1)
+    has_words = per_sentence > 0
+    lengths = per_sentence[has_words]
+
+    def count(kind: int) -> int:
+        return int(np.count_nonzero(kinds == kind))
+
+    exclaimed = np.zeros(per_sentence.size, dtype=bool)
+    exclaimed[tokens.sentence[kinds == EXCLAIM]] = True
+
+    word_frequencies = np.bincount(codes, minlength=len(tokens.vocabulary))
+    lazy_mask = _lexicon_mask(tokens.vocabulary, LAZY_ADJECTIVE_FORMS)
+
+    def lexicon_count(lexicon: set) -> int:
+        return int(word_frequencies[_lexicon_mask(tokens.vocabulary, lexicon)].sum())
+
+    # Bigrams as pair codes (first * V + second), matched against the hedge phrases
+    size = len(tokens.vocabulary)
+    lookup = {word: code for code, word in enumerate(tokens.vocabulary)}
+    bigram_codes = [lookup[a] * size + lookup[b] for a, b in HESITATION_BIGRAMS if a in lookup and b in lookup]
+    bigrams = codes[:-1] * size + codes[1:] if codes.size > 1 else np.zeros(0, dtype=np.int64)
+
+    counts = {
+        "words": int(is_word.sum()),
+        "sentences": int(lengths.size),
+        "sentence_words_sq": int(np.square(lengths).sum()),
+        "long_sentences": int(np.count_nonzero(lengths >= LONG_SENTENCE_WORDS)),
+        "short_sentences": int(np.count_nonzero(lengths <= SHORT_SENTENCE_WORDS)),
+        "commas": count(COMMA),
+        "semicolons_colons": count(SEMICOLON) + count(COLON),
+        "dashes": count(DASH),
+        "questions": count(QUESTION),
+        "subordinators": lexicon_count(SUBORDINATORS),
+        "adjectives": lexicon_count(ADJECTIVE_FORMS),
+        "lazy_adjectives": int(word_frequencies[lazy_mask].sum()),
+        "exclamation_sentences": int(np.count_nonzero(exclaimed[has_words])),
+        "intensifiers": lexicon_count(INTENSIFIERS),
+        "hesitations": lexicon_count(HESITATION_WORDS) + int(np.isin(bigrams, bigram_codes).sum()),
+    }
+    metrics = metrics_from_counts(counts)
+    # Order statistics only exist per text (not additive)
+    metrics["median_sentence_words"] = round(float(np.median(lengths)), 4) if lengths.size else 0.0
+    metrics["p90_sentence_words"] = round(float(np.percentile(lengths, 90)), 4) if lengths.size else 0.0
+
+    histogram, _ = np.histogram(lengths, bins=HISTOGRAM_EDGES)
+    labels = [
+        f"{low}-{high - 1}" if high < HISTOGRAM_EDGES[-1] else f"{low}+"
+        for low, high in zip(HISTOGRAM_EDGES[:-1], HISTOGRAM_EDGES[1:])
+    ]
+
+    lazy_codes = np.flatnonzero(lazy_mask & (word_frequencies > 0))
+    top = lazy_codes[np.argsort(-word_frequencies[lazy_codes], kind="stable")][:10]
+
+    return StyleMetrics(
+        word_count=counts["words"],
+        sentence_count=counts["sentences"],
+        counts=counts,
+        metrics=metrics,
+        sentence_histogram=dict(zip(labels, histogram.tolist())),
+        lazy_adjectives=[(tokens.vocabulary[code], int(word_frequencies[code])) for code in top],
+    )
+
+
+def style_counts(text: str) -> Dict[str, int]:
+    """Additive counts of a chapter's plain text (for stat rows)."""
+    return compute_metrics(tokenize(text)).counts
+
+
+def compare_to_profile(metrics: Dict[str, float], profile=TARGET_PROFILE) -> List[dict]:
+    checks = []
+    for name, (low, high) in profile.items():
+        value = metrics[name]
+        if low is not None and value < low:
+            status = "low"
+        elif high is not None and value > high:
+            status = "high"
+        else:
+            status = "ok"
+        checks.append({"metric": name, "value": value, "min": low, "max": high, "status": status})
+    return checks
+
+
+def analyze_style(text: str) -> StyleMetrics:
+    """Tokenizes once, computes every metric and scores it against the target profile."""
+    started = time.perf_counter()
+    result = compute_metrics(tokenize(strip_html(text)))
+    result.checks = compare_to_profile(result.metrics)
+    result.score = round(sum(check["status"] == "ok" for check in result.checks) / len(result.checks), 3)
+    result.elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    return result
@@ -0,0 +1,254 @@
+"""
+Hierarchical manuscript summaries.
+Each chapter keeps a cached summary keyed by its content hash, and each
+project a summary rolled up from its chapter summaries. Regeneration runs
+in the background, debounced after writes, and only when a hash changed.
+Council modes use build_context() instead of a client-supplied context.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from database import SessionLocal, WriteSessionLocal
+from models import Chapter, ChapterSummary, ProjectSummary
+from orchestrator import council
+from text_utils import content_hash
+from workers import WEB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# Quiet period after the last save before a chapter is re-summarized
+SUMMARY_DEBOUNCE_SECONDS = float(os.getenv("SUMMARY_DEBOUNCE_SECONDS", "30"))
+
+# How many preceding chapter summaries go into the council context
+CONTEXT_CHAPTERS = int(os.getenv("SUMMARY_CONTEXT_CHAPTERS", "5"))
+
+# With several workers, a summary refreshed by another process can't clear this
+# process's context cache, so entries expire instead (single worker: never)
+CONTEXT_CACHE_TTL = (
+    float(os.getenv("SUMMARY_CONTEXT_CACHE_TTL", "60")) if WEB_CONCURRENCY > 1 else None
+)
+
+
+def same_project(column, project_id: Optional[int]):
+    """Filter on a project_id column; chapters without a project share one bucket."""
+    return column.is_(None) if project_id is None else column == project_id
+
+
+class SummaryService:
+    """Keeps chapter/project summaries fresh and assembles manuscript context."""
+
+    def __init__(self, debounce_seconds: float = SUMMARY_DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timers: dict[tuple, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._context_cache: dict[Optional[int], tuple] = {}  # (built at, context)
+
+    def start(self):
+        """Binds the service to the running event loop (called from lifespan)."""
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # --- Scheduling (safe to call from threadpool routes) ---
+
+    def schedule_chapter(self, chapter_id: int):
+        """Marks a chapter as edited; it is re-summarized once edits settle."""
+        self._schedule(("chapter", chapter_id))
+
+    def schedule_project(self, project_id: Optional[int]):
+        """Marks a project roll-up as stale (e.g. after a chapter was deleted)."""
+        self._schedule(("project", project_id))
+
+    def _schedule(self, key: tuple):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._debounce, key)
+
+    def _debounce(self, key: tuple):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[key] = self._loop.call_later(self.debounce_seconds, self._launch, key)
+
+    def _launch(self, key: tuple):
+        self._timers.pop(key, None)
+        kind, target_id = key
+        if kind == "chapter":
+            task = self._loop.create_task(self._refresh_chapter_and_project(target_id))
+        else:
+            task = self._loop.create_task(self.refresh_project(target_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def sweep(self):
+        """Refreshes every stale summary (hash mismatch), e.g. after startup."""
+        chapter_ids = await asyncio.to_thread(self._all_chapter_ids)
+        projects = set()
+        for chapter_id in chapter_ids:
+            try:
+                changed, project_id = await self.refresh_chapter(chapter_id)
+            except Exception:
+                logger.exception("Falha ao resumir capítulo %s", chapter_id)
+                continue
+            if changed:
+                projects.add(project_id)
+        for project_id in projects:
+            await self.refresh_project(project_id)
+
+    # --- Regeneration ---
+
+    async def _refresh_chapter_and_project(self, chapter_id: int):
+        try:
+            changed, project_id = await self.refresh_chapter(chapter_id)
+            if changed:
+                await self.refresh_project(project_id)
+        except Exception:
+            logger.exception("Falha ao atualizar resumos do capítulo %s", chapter_id)
+
+    async def refresh_chapter(self, chapter_id: int) -> tuple:
+        """
+        Re-summarizes a chapter if its content hash changed.
+        Returns (changed, project_id).
+        """
+        loaded = await asyncio.to_thread(self._load_chapter, chapter_id)
+        if loaded is None:
+            return False, None
+        title, text, project_id, cached_hash = loaded
+
+        # Hash of the plain text: formatting-only edits don't trigger a new summary
+        new_hash = content_hash(text)
+        if new_hash == cached_hash:
+            return False, project_id
+
+        summary = await council.summarize_chapter(title, text) if text else ""
+        await asyncio.to_thread(self._save_chapter_summary, chapter_id, new_hash, summary)
+        self._context_cache.clear()
+        return True, project_id
+
+    async def refresh_project(self, project_id: Optional[int]):
+        """Rebuilds the project roll-up if any chapter summary changed."""
+        try:
+            hashes, summaries, cached_hash = await asyncio.to_thread(self._load_project, project_id)
+            source_hash = content_hash("|".join(hashes))
+            if source_hash == cached_hash:
+                return
+            summary = await council.summarize_project(summaries) if summaries else ""
+            await asyncio.to_thread(self._save_project_summary, project_id, source_hash, summary)
+            self._context_cache.clear()
+        except Exception:
+            logger.exception("Falha ao atualizar resumo do projeto %s", project_id)
+
+    # --- Context assembly ---
+
+    async def build_context(self, chapter_id: Optional[int] = None) -> str:
+        """
+        Manuscript context for council prompts: the project summary plus the
+        summaries of the chapters right before chapter_id.
+        """
+        cached = self._context_cache.get(chapter_id)
+        if cached is not None and (CONTEXT_CACHE_TTL is None or time.monotonic() - cached[0] < CONTEXT_CACHE_TTL):
+            return cached[1]
+        context = await asyncio.to_thread(self._assemble_context, chapter_id)
+        self._context_cache[chapter_id] = (time.monotonic(), context)
+        return context
+
+    # --- Blocking DB helpers (run in a worker thread) ---
+
+    def _all_chapter_ids(self) -> list:
+        with SessionLocal() as db:
+            return [row[0] for row in db.query(Chapter.id).order_by(Chapter.order).all()]
+
+    def _load_chapter(self, chapter_id: int):
+        with SessionLocal() as db:
+            chapter = db.query(Chapter.title, Chapter.plain_text, Chapter.project_id).filter(
+                Chapter.id == chapter_id
+            ).first()
+            if chapter is None:
+                return None
+            cached = db.query(ChapterSummary.content_hash).filter(
+                ChapterSummary.chapter_id == chapter_id
+            ).scalar()
+            return chapter.title, chapter.plain_text or "", chapter.project_id, cached
+
+    def _save_chapter_summary(self, chapter_id: int, new_hash: str, summary: str):
+        with WriteSessionLocal() as db:
+            row = db.query(ChapterSummary).filter(ChapterSummary.chapter_id == chapter_id).first()
+            if row is None:
+                row = ChapterSummary(chapter_id=chapter_id)
+                db.add(row)
+            row.content_hash = new_hash
+            row.summary = summary
+            db.commit()
+
+    def _load_project(self, project_id: Optional[int]):
+        with SessionLocal() as db:
+            rows = (
+                db.query(Chapter.title, ChapterSummary.content_hash, ChapterSummary.summary)
+                .join(ChapterSummary, ChapterSummary.chapter_id == Chapter.id)
+                .filter(same_project(Chapter.project_id, project_id))
+                .order_by(Chapter.order)
+                .all()
+            )
+            cached = db.query(ProjectSummary.source_hash).filter(
+                same_project(ProjectSummary.project_id, project_id)
+            ).scalar()
+            hashes = [row.content_hash for row in rows]
+            summaries = [f"[{row.title}]\n{row.summary}" for row in rows if row.summary]
+            return hashes, summaries, cached
+
+    def _save_project_summary(self, project_id: Optional[int], source_hash: str, summary: str):
+        with WriteSessionLocal() as db:
+            row = db.query(ProjectSummary).filter(
+                same_project(ProjectSummary.project_id, project_id)
+            ).first()
+            if row is None:
+                row = ProjectSummary(project_id=project_id)
+                db.add(row)
+            row.source_hash = source_hash
+            row.summary = summary
+            db.commit()
+
+    def _assemble_context(self, chapter_id: Optional[int]) -> str:
+        with SessionLocal() as db:
+            project_id, order = None, None
+            if chapter_id is not None:
+                found = db.query(Chapter.project_id, Chapter.order).filter(Chapter.id == chapter_id).first()
+                if found is not None:
+                    project_id, order = found
+
+            project_summary = db.query(ProjectSummary.summary).filter(
+                same_project(ProjectSummary.project_id, project_id)
+            ).scalar()
+
+            previous = (
+                db.query(Chapter.title, ChapterSummary.summary)
+                .join(ChapterSummary, ChapterSummary.chapter_id == Chapter.id)
+                .filter(same_project(Chapter.project_id, project_id))
+            )
+            if order is not None:
+                previous = previous.filter(Chapter.order < order)
+            previous = previous.order_by(Chapter.order.desc()).limit(CONTEXT_CHAPTERS).all()
+
+        parts = []
+        if project_summary:
+            parts.append(f"RESUMO DO PROJETO:\n{project_summary}")
+        if previous:
+            chapters = "\n\n".join(f"[{title}]\n{summary}" for title, summary in reversed(previous) if summary)
+            if chapters:
+                parts.append(f"CAPÍTULOS ANTERIORES:\n{chapters}")
+        return "\n\n".join(parts)
+
+
+# Singleton instance
+summary_service = SummaryService()
@@ -0,0 +1,104 @@
+"""
+Text helpers shared by the council and chapter routes.
+Chapters arrive either as TipTap HTML or as plain text selections.
+"""
+
+import hashlib
+import html
+import re
+from typing import List
+
+# Scene breaks: Markdown rules, "* * *" style dinkuses, a lone "#", or <hr>
+SCENE_BREAK_RE = re.compile(
+    r'(?:^[ \t]*(?:\*[ \t]*){3,}$|^[ \t]*(?:-[ \t]*){3,}$|^[ \t]*#[ \t]*$|<hr\s*/?>)',
+    re.MULTILINE | re.IGNORECASE,
+)
+
+# Paragraph boundaries: blank lines or closing block tags
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n|(?<=</p>)|(?<=</h[1-6]>)|(?<=</blockquote>)', re.IGNORECASE)
+
+# Any tag, and the tags that end a line of prose
+TAG_RE = re.compile(r'<[^>]+>')
+BLOCK_END_RE = re.compile(r'</(?:p|h[1-6]|li|blockquote)>|<br\s*/?>|<hr\s*/?>', re.IGNORECASE)
+EXTRA_NEWLINES_RE = re.compile(r'\n{3,}')
+
+# Characters outside the BMP: one code point here, two UTF-16 units in JS strings
+ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+# ...or half of one (a JS edit may replace just the low surrogate of a pair)
+UTF16_PAIR_RE = re.compile('[\ud800-\udfff\U00010000-\U0010FFFF]')
+
+
+def strip_html(text: str) -> str:
+    """Converts TipTap HTML to plain text, keeping paragraph breaks."""
+    if not text:
+        return ""
+    if "<" not in text and "&" not in text:
+        return text.strip()  # Already plain text
+    text = BLOCK_END_RE.sub("\n\n", text)
+    text = html.unescape(TAG_RE.sub("", text))
+    return EXTRA_NEWLINES_RE.sub("\n\n", text).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _surrogate_pair(match) -> str:
+    code = ord(match.group()) - 0x10000
+    return chr(0xD800 + (code >> 10)) + chr(0xDC00 + (code & 0x3FF))
+
+
+def to_utf16_units(text: str) -> str:
+    """One char per UTF-16 code unit (astral chars split into surrogates), so JS string offsets index it."""
+    return ASTRAL_RE.sub(_surrogate_pair, text)
+
+
+def from_utf16_units(text: str) -> str:
+    """Inverse of to_utf16_units; raises UnicodeError if an edit split a surrogate pair."""
+    return text.encode("utf-16-le", "surrogatepass").decode("utf-16-le")
+
+
+def count_words(text: str) -> int:
+    return len(text.split()) if text else 0
+
+
+def get_preview(content: str, max_chars: int = 100) -> str:
+    """Card preview of plain text: whitespace (paragraph breaks) collapsed, cut at a word."""
+    if not content:
+        return ""
+    clean = " ".join(content[:max_chars * 4].split())
+    if len(clean) <= max_chars:
+        return clean
+    return clean[:max_chars].rsplit(' ', 1)[0] + "..."
+
+
+def split_scenes(text: str) -> List[str]:
+    """Splits text at scene breaks, dropping the break markers."""
+    return [scene for scene in SCENE_BREAK_RE.split(text) if scene.strip()]
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Splits text at paragraph boundaries (blank lines or block tags)."""
+    return [para for para in PARAGRAPH_BREAK_RE.split(text) if para.strip()]
+
+
+def split_into_chunks(text: str, max_words: int) -> List[str]:
+    """
+    Splits a long text into chunks of at most ~max_words words.
+    Scene breaks always end a chunk; inside a scene, paragraphs are packed
+    greedily. A single paragraph longer than max_words becomes its own chunk.
+    """
+    chunks: List[str] = []
+    for scene in split_scenes(text):
+        current: List[str] = []
+        current_words = 0
+        for para in split_paragraphs(scene):
+            words = len(para.split())
+            if current and current_words + words > max_words:
+                chunks.append("\n\n".join(current))
+                current, current_words = [], 0
+            current.append(para.strip())
+            current_words += words
+        if current:
+            chunks.append("\n\n".join(current))
+    return chunks
@@ -0,0 +1,85 @@
+"""
+Multi-worker mode (uvicorn --workers N, N from WEB_CONCURRENCY).
+Workers are separate processes, so each piece of process-local state is
+either shared through SQLite, split between workers, or owned by one worker:
+- shared: chapters, revisions, summaries, analyses, stats (all in SQLite;
+  writes begin IMMEDIATE and wait on busy_timeout, see database.py)
+- partitioned: the council's per-provider concurrency budget is divided
+  between workers (at least one call each); flow-check supersession and throttling, summary debounce
+  timers and the council context cache are per process (a writer whose
+  requests land on two workers may get an extra flow check)
+- single owner: background jobs (summary sweep, compaction, WAL checkpoint,
+  optimize, VACUUM) run in whichever worker holds the jobs lock file; the
+  others keep retrying and take over if it exits
+Schema creation and migrations run under an exclusive startup lock, one
+worker after the other.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: the desktop sidecar is a single process
+    fcntl = None
+
+from database import DATA_DIR
+
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+# How often a worker without the jobs lock checks whether it was released
+JOB_LOCK_RETRY_SECONDS = float(os.getenv("ZENWRITER_JOB_LOCK_RETRY_SECONDS", "30"))
+
+STARTUP_LOCK_PATH = os.path.join(DATA_DIR, "startup.lock")
+JOB_LOCK_PATH = os.path.join(DATA_DIR, "jobs.lock")
+
+_job_lock: Optional[IO] = None
+
+
+def partitioned(total: int) -> int:
+    """
+    This worker's share of a limit meant for the whole deployment. Rounded
+    down, so the shares add up to at most `total`, except that each worker
+    gets at least 1 (more workers than `total` exceed it).
+    """
+    return max(1, total // WEB_CONCURRENCY)
+
+
+@contextmanager
+def startup_lock():
+    """Exclusive across workers (blocks until the previous holder is done)."""
+    with open(STARTUP_LOCK_PATH, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def acquire_job_lock() -> bool:
+    """
+    Non-blocking; True if this worker owns the background jobs. The lock is
+    held until release_job_lock() or process exit (the OS drops it then).
+    """
+    global _job_lock
+    if _job_lock is not None:
+        return True
+    handle = open(JOB_LOCK_PATH, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+    _job_lock = handle
+    return True
+
+
+def release_job_lock():
+    global _job_lock
+    if _job_lock is not None:
+        _job_lock.close()
+        _job_lock = None
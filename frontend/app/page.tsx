@@ -85,7 +85,7 @@ export default function Home() {
     try {
       const result = await polishText({
         text,
-        manuscript_context: 'Contexto geral do projeto literário.',
+        chapter_id: activeChapterId ?? undefined,
         project_name: 'Projeto',
         style_ref: 'Metamodernismo',
         chapter: chapterTitle,
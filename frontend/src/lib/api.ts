@@ -17,16 +17,22 @@ export interface PolishReport {
     consensus: string;
     divergence: string;
     verdict: string;
+    timings?: Record<string, number>;  // Milliseconds since the request started
+    chunks?: number;
+    cached?: boolean;  // Reused stored analysis (no timings)
 }
 
 export interface PolishRequest {
     text: string;
-    manuscript_context: string;
+    manuscript_context?: string;
+    chapter_id?: number;
     project_name?: string;
     style_ref?: string;
     chapter?: string;
     scene?: string;
     emotional_state?: string;
+    pipelined?: boolean;
+    chunked?: boolean;
 }
 
 export interface ConsistencyAlert {
@@ -38,7 +44,9 @@ export interface ConsistencyAlert {
 
 export interface FlowRequest {
     current_text: string;
-    manuscript_context: string;
+    manuscript_context?: string;
+    session_id?: string;
+    chapter_id?: number;
 }
 
 export interface DoubtRequest {
@@ -78,6 +86,11 @@ export async function flowCheck(request: FlowRequest): Promise<ConsistencyAlert
         throw new Error(error.detail || 'Failed to check flow');
     }
 
+    // 202: the server deferred this check (see Retry-After); nothing to report yet
+    if (response.status === 202) {
+        return null;
+    }
+
     return response.json();
 }
 
@@ -19,6 +19,7 @@ export interface Chapter {
     content: string;
     order: number;
     word_count: number;
+    revision: number;
     color: string | null;
     created_at: string;
     updated_at: string;
@@ -38,10 +39,29 @@ export interface ChapterUpdate {
     color?: string;
 }
 
+// Offsets are JS string indices (UTF-16 code units); the server converts them
+export interface EditOp {
+    pos: number;
+    delete?: number;
+    insert?: string;
+}
+
+export interface EditOpsResult {
+    id: number;
+    revision: number;
+    word_count: number;
+    updated_at: string;
+}
+
 // API Functions
 
-export async function listChapters(): Promise<ChapterCard[]> {
-    const response = await fetch(`${API_BASE_URL}/chapters`);
+// Without a project id, every chapter is listed (0 = chapters without a project)
+export async function listChapters(projectId?: number): Promise<ChapterCard[]> {
+    const params = new URLSearchParams();
+    if (projectId !== undefined) {
+        params.set('project_id', String(projectId));
+    }
+    const response = await fetch(`${API_BASE_URL}/chapters?${params}`);
     if (!response.ok) {
         throw new Error('Falha ao carregar capítulos');
     }
@@ -68,12 +88,26 @@ export async function createChapter(data: ChapterCreate = {}): Promise<Chapter>
     return response.json();
 }
 
-export async function updateChapter(id: number, data: ChapterUpdate): Promise<Chapter> {
+// Pass the ETag of the copy being edited to reject overwriting a newer save (412).
+export class PreconditionFailedError extends Error {
+    constructor(public currentEtag: string) {
+        super('O capítulo foi alterado em outra sessão');
+    }
+}
+
+export async function updateChapter(id: number, data: ChapterUpdate, ifMatch?: string): Promise<Chapter> {
+    const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+    if (ifMatch) {
+        headers['If-Match'] = ifMatch;
+    }
     const response = await fetch(`${API_BASE_URL}/chapters/${id}`, {
         method: 'PUT',
-        headers: { 'Content-Type': 'application/json' },
+        headers,
         body: JSON.stringify(data),
     });
+    if (response.status === 412) {
+        throw new PreconditionFailedError(response.headers.get('ETag') ?? '');
+    }
     if (!response.ok) {
         throw new Error('Falha ao salvar capítulo');
     }
@@ -99,3 +133,58 @@ export async function reorderChapters(chapterIds: number[]): Promise<void> {
         throw new Error('Falha ao reordenar capítulos');
     }
 }
+
+export async function moveChapter(chapterId: number, afterId: number | null): Promise<void> {
+    const response = await fetch(`${API_BASE_URL}/chapters/${chapterId}/move`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ after_id: afterId }),
+    });
+    if (!response.ok) {
+        throw new Error('Falha ao mover capítulo');
+    }
+}
+
+// Delta save. Throws StaleRevisionError (409) when the base revision is outdated.
+export class StaleRevisionError extends Error {
+    constructor(public currentRevision: number) {
+        super('Revisão desatualizada');
+    }
+}
+
+export async function applyChapterOps(id: number, baseRevision: number, ops: EditOp[]): Promise<EditOpsResult> {
+    const response = await fetch(`${API_BASE_URL}/chapters/${id}/ops`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ base_revision: baseRevision, ops }),
+    });
+    if (response.status === 409) {
+        const error = await response.json();
+        throw new StaleRevisionError(error.detail.revision);
+    }
+    if (!response.ok) {
+        throw new Error('Falha ao salvar alterações');
+    }
+    return response.json();
+}
+
+export interface SearchHit {
+    chapter_id: number;
+    title: string;
+    order: number;
+    score: number;
+    snippet: string;
+    highlights: [number, number][];  // [start, end) offsets into snippet
+}
+
+export async function searchChapters(query: string, projectId?: number, limit = 20): Promise<SearchHit[]> {
+    const params = new URLSearchParams({ q: query, limit: String(limit) });
+    if (projectId !== undefined) {
+        params.set('project_id', String(projectId));
+    }
+    const response = await fetch(`${API_BASE_URL}/search?${params}`);
+    if (!response.ok) {
+        throw new Error('Falha na busca');
+    }
+    return response.json();
+}
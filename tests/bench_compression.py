@@ -0,0 +1,56 @@
+"""
+Benchmark: CPU cost and ratio of the response encodings (compression.py)
+across payload sizes, to keep COMPRESSION_MIN_SIZE and the levels honest.
+
+Run from the repo root:  python tests/bench_compression.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import compression
+
+WORDS = (
+    "a xícara de café esfriava sobre mesa enquanto ela relia pela terceira vez carta "
+    "que nunca chegou enviar lá fora chuva insistia janela silêncio casa memória"
+).split()
+SIZES = [256, 1024, 4096, 65536, 512 * 1024, 2 * 1024 * 1024]
+DURATION = 0.5  # Seconds per measurement
+
+
+def make_payload(size: int) -> bytes:
+    rng = random.Random(size)
+    paragraphs, length = [], 0
+    while length < size:
+        paragraph = "<p>" + " ".join(rng.choice(WORDS) for _ in range(60)) + ".</p>"
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+    return json.dumps({"id": 1, "content": "".join(paragraphs)}, ensure_ascii=False).encode("utf-8")[:size]
+
+
+def measure(encoding: str, payload: bytes):
+    runs, started = 0, time.process_time()
+    while time.process_time() - started < DURATION:
+        out = compression.StreamCompressor(encoding).compress(payload, final=True)
+        runs += 1
+    return (time.process_time() - started) / runs, len(out)
+
+
+def main():
+    print(f"{'size':>9} {'encoding':>8} {'cpu µs':>9} {'MB/s':>7} {'out':>9} {'ratio':>6}")
+    for size in SIZES:
+        payload = make_payload(size)
+        for encoding in compression.ENCODINGS:
+            seconds, out = measure(encoding, payload)
+            print(
+                f"{size:>9} {encoding:>8} {seconds * 1e6:>9.0f} {size / seconds / 1e6:>7.0f} "
+                f"{out:>9} {out / size:>6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: FastAPI's default response path vs the orjson fast path (fast_json)
+for chapter payloads, from a small scene to a whole-book chapter.
+
+Run from the repo root:  python tests/bench_serialization.py
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from fastapi.encoders import jsonable_encoder
+
+import fast_json
+from models import Chapter
+from routes_chapters import ChapterResponse
+
+PARAGRAPH = (
+    "<p>A xícara de café esfriava sobre a mesa enquanto ela relia, pela terceira vez, "
+    "a carta que nunca chegou a enviar. Lá fora, a chuva insistia.</p>"
+)
+SIZES_KB = [10, 100, 500, 2000]
+DURATION = 1.0  # Seconds per measurement
+
+
+def make_chapter(size_kb: int) -> Chapter:
+    content = PARAGRAPH * max(1, size_kb * 1024 // len(PARAGRAPH.encode("utf-8")))
+    now = datetime.utcnow()
+    return Chapter(
+        id=1, title="Capítulo 1", content=content, order=1024, word_count=len(content.split()),
+        revision=3, color=None, created_at=now, updated_at=now, project_id=1,
+    )
+
+
+def default_path(chapter: Chapter) -> bytes:
+    # What FastAPI does with `return chapter` under response_model=ChapterResponse
+    model = ChapterResponse.model_validate(chapter)
+    data = jsonable_encoder(model.model_dump(mode="json"))
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(chapter: Chapter) -> bytes:
+    return fast_json.orm_response(chapter, ChapterResponse).body
+
+
+def measure(fn, chapter: Chapter):
+    runs, started = 0, time.perf_counter()
+    while time.perf_counter() - started < DURATION:
+        body = fn(chapter)
+        runs += 1
+    elapsed = time.perf_counter() - started
+    return elapsed / runs, len(body) * runs / elapsed / 1e6
+
+
+def main():
+    print(f"{'size':>8} {'default ms':>11} {'MB/s':>8} {'orjson ms':>10} {'MB/s':>8} {'speedup':>8}")
+    for size_kb in SIZES_KB:
+        chapter = make_chapter(size_kb)
+        assert json.loads(default_path(chapter)) == json.loads(fast_path(chapter))
+        slow, slow_rate = measure(default_path, chapter)
+        fast, fast_rate = measure(fast_path, chapter)
+        print(
+            f"{size_kb:>6}KB {slow * 1000:>11.3f} {slow_rate:>8.0f} "
+            f"{fast * 1000:>10.3f} {fast_rate:>8.0f} {slow / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+In-process checks of the chapter API (FastAPI TestClient on a throwaway
+data directory, no LLM keys needed).
+
+Run from the repo root:  python tests/test_chapter_api.py  (or with pytest)
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+# Before the backend is imported: database.py reads it at import time
+os.environ["ZENWRITER_DATA_DIR"] = tempfile.mkdtemp(prefix="zenwriter-test-")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import main
+from database import SessionLocal, async_write_session, engine
+from models import Chapter, ChapterRevision, Project, ProjectStats
+import project_stats
+import revisions
+from routes_chapters import rebalance_order as rebalance
+
+
+def create_chapter(client: TestClient, content: str, **fields) -> dict:
+    response = client.post("/chapters", json={"title": "Capítulo", "content": content, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def apply_ops(client: TestClient, chapter: dict, ops: list):
+    # json.dumps escapes lone surrogates like JSON.stringify does
+    body = json.dumps({"base_revision": chapter["revision"], "ops": ops})
+    return client.patch(
+        f"/chapters/{chapter['id']}/ops", content=body, headers={"Content-Type": "application/json"}
+    )
+
+
+def test_edit_ops_use_utf16_offsets():
+    with TestClient(main.app) as client:
+        # "😀" is one code point but two UTF-16 units: JS puts "!" at index 7
+        chapter = create_chapter(client, "Olá 😀 mundo")
+        assert "Olá 😀 mundo".index("mundo") == 6
+        response = apply_ops(client, chapter, [{"pos": 7, "delete": 0, "insert": "!"}])
+        assert response.status_code == 200, response.text
+        saved = client.get(f"/chapters/{chapter['id']}").json()
+        assert saved["content"] == "Olá 😀 !mundo"
+        # The stored delta rebuilds the same text
+        assert client.get(f"/chapters/{chapter['id']}/revisions/1").json()["content"] == saved["content"]
+
+
+def test_edit_ops_replace_half_of_surrogate_pair():
+    with TestClient(main.app) as client:
+        # A JS diff of "😀" -> "😁" only replaces the low surrogate
+        chapter = create_chapter(client, "a😀b")
+        response = apply_ops(client, chapter, [{"pos": 2, "delete": 1, "insert": "\ude01"}])
+        assert response.status_code == 200, response.text
+        assert client.get(f"/chapters/{chapter['id']}").json()["content"] == "a😁b"
+
+        chapter = client.get(f"/chapters/{chapter['id']}").json()
+        response = apply_ops(client, chapter, [{"pos": 2, "delete": 1}])
+        assert response.status_code == 400
+
+
+def test_edit_ops_reject_insert_past_the_end():
+    with TestClient(main.app) as client:
+        chapter = create_chapter(client, "curto")
+        response = apply_ops(client, chapter, [{"pos": 6, "insert": "!"}])
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("Posição 6")
+        # Appending right at the end is fine
+        response = apply_ops(client, chapter, [{"pos": 5, "insert": "!"}])
+        assert response.status_code == 200, response.text
+
+
+def test_move_keeps_reading_order_through_rebalances():
+    with TestClient(main.app) as client:
+        project = 21
+        a, b, c, d = (create_chapter(client, name, title=name, project_id=project)["id"] for name in "abcd")
+
+        def move(chapter_id, after_id):
+            response = client.patch(f"/chapters/{chapter_id}/move", json={"after_id": after_id})
+            assert response.status_code == 200, response.text
+
+        def reading_order() -> list:
+            cards = client.get("/chapters", params={"project_id": project}).json()
+            return [card["id"] for card in cards]
+
+        move(d, a)  # Between neighbours
+        assert reading_order() == [a, d, b, c]
+        move(c, None)  # Head
+        assert reading_order() == [c, a, d, b]
+        move(a, b)  # Tail
+        assert reading_order() == [c, d, b, a]
+
+        # Each move halves the gap after c until no integer is left: forces a rebalance
+        expected = [c, d, b, a]
+        rebalances = []
+
+        async def counted_rebalance(db):
+            rebalances.append(db)
+            await rebalance(db)
+
+        with mock.patch("routes_chapters.rebalance_order", counted_rebalance):
+            for step in range(14):
+                moved = expected[2]
+                move(moved, c)
+                expected.remove(moved)
+                expected.insert(1, moved)
+                assert reading_order() == expected, f"step {step}"
+        assert rebalances
+        with SessionLocal() as db:
+            orders = [order for (order,) in db.query(Chapter.order).filter(Chapter.project_id == project)]
+        assert len(set(orders)) == 4
+
+        response = client.patch(f"/chapters/{a}/move", json={"after_id": 999999})
+        assert response.status_code == 404
+
+
+def test_revision_history_survives_compaction():
+    with TestClient(main.app) as client:
+        chapter = create_chapter(client, "Versão 0.")
+        contents = {0: "Versão 0."}
+        total = revisions.SNAPSHOT_EVERY + 5
+        for revision in range(1, total + 1):
+            current = client.get(f"/chapters/{chapter['id']}")
+            # Alternate full saves (diffed deltas) and edit ops (stored ops)
+            if revision % 2:
+                text = contents[revision - 1] + f" Frase {revision}."
+                response = client.put(
+                    f"/chapters/{chapter['id']}", json={"content": text},
+                    headers={"If-Match": current.headers["etag"]},
+                )
+            else:
+                text = f"Início {revision}. " + contents[revision - 1]
+                response = apply_ops(client, current.json(), [{"pos": 0, "insert": f"Início {revision}. "}])
+            assert response.status_code == 200, response.text
+            contents[revision] = text
+
+        # Spread the saves over the past days: older ones get thinned to one per day
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            for row in db.query(ChapterRevision).filter(ChapterRevision.chapter_id == chapter["id"]):
+                row.created_at = now - timedelta(days=(total - row.revision) // 4, minutes=total - row.revision)
+            db.commit()
+            assert revisions.compact_chapter(db, chapter["id"], now) > 0
+            kept = [row.revision for row in db.query(ChapterRevision.revision).filter(
+                ChapterRevision.chapter_id == chapter["id"]).order_by(ChapterRevision.revision)]
+        assert len(kept) < total + 1 and kept[-1] == total
+
+        for revision in range(total + 1):
+            response = client.get(f"/chapters/{chapter['id']}/revisions/{revision}")
+            if revision < kept[0]:
+                assert response.status_code == 404
+                continue
+            served = max(kept_revision for kept_revision in kept if kept_revision <= revision)
+            assert response.json()["revision"] == served
+            assert response.json()["content"] == contents[served]
+
+        current = client.get(f"/chapters/{chapter['id']}")
+        response = client.post(
+            f"/chapters/{chapter['id']}/revisions/{kept[0]}/restore",
+            headers={"If-Match": current.headers["etag"]},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["content"] == contents[kept[0]]
+        assert response.json()["revision"] == total + 1
+
+
+def project_rollups(conn) -> dict:
+    """project_id -> stat totals, leaving out projects with no chapters left."""
+    columns = ["chapter_count"] + project_stats.STAT_FIELDS
+    rows = conn.execute(select(ProjectStats.project_id, *[getattr(ProjectStats, name) for name in columns]))
+    return {row[0]: tuple(row[1:]) for row in rows if row[1]}
+
+
+def test_project_stats_deltas_match_a_rebuild():
+    async def reassign(chapter_id: int, project_id: int):
+        # No route moves a chapter to another project yet: same write path a route would use
+        async with async_write_session() as db:
+            chapter = await db.get(Chapter, chapter_id)
+            chapter.project_id = project_id
+            await project_stats.record_chapter(db, chapter.id, project_id, chapter.plain_text, chapter.word_count)
+            await db.commit()
+
+    with TestClient(main.app) as client:
+        first = create_chapter(client, "<p>Ela parou. Era tarde, muito tarde; o trem já tinha partido!</p>", project_id=31)
+        second = create_chapter(client, "Talvez ele voltasse. Quem sabe?", project_id=31)
+        third = create_chapter(client, "Um capítulo solto, sem projeto.")
+        current = client.get(f"/chapters/{first['id']}")
+        response = client.put(
+            f"/chapters/{first['id']}", json={"content": "<p>Ela ficou. Era cedo — cedo demais, talvez.</p>"},
+            headers={"If-Match": current.headers["etag"]},
+        )
+        assert response.status_code == 200, response.text
+        response = apply_ops(client, second, [{"pos": 0, "insert": "Muito bonito: "}])
+        assert response.status_code == 200, response.text
+        client.portal.call(reassign, third["id"], 31)
+        client.portal.call(reassign, second["id"], 32)
+        assert client.patch(f"/chapters/{second['id']}/move", json={"after_id": None}).status_code == 200
+        assert client.delete(f"/chapters/{first['id']}").status_code == 200
+
+    with engine.connect() as conn:
+        incremental = project_rollups(conn)
+        project_stats.rebuild(conn)  # Rolled back when the connection closes
+        rebuilt = project_rollups(conn)
+    assert incremental == rebuilt
+    assert rebuilt[32][0] == 1 and rebuilt[31][0] >= 1
+
+
+def test_search_project_zero_means_unassigned():
+    with TestClient(main.app) as client:
+        loose = create_chapter(client, "O farol apagou de madrugada.")
+        in_project = create_chapter(client, "O farol da ilha também.", project_id=7)
+
+        def hits(**params) -> set:
+            response = client.get("/search", params={"q": "farol", **params})
+            assert response.status_code == 200, response.text
+            return {hit["chapter_id"] for hit in response.json()}
+
+        assert loose["id"] in hits(project_id=0) and in_project["id"] not in hits(project_id=0)
+        assert hits(project_id=7) == {in_project["id"]}
+        assert {loose["id"], in_project["id"]} <= hits()
+
+
+def test_list_without_project_id_lists_every_chapter():
+    with TestClient(main.app) as client:
+        with SessionLocal() as db:
+            db.merge(Project(id=9, title="Romance"))
+            db.commit()
+        loose = create_chapter(client, "Sem projeto")
+        imported = client.post("/projects/9/import", content="# Um\n\nTexto".encode()).json()["chapters"][0]
+
+        def listed(**params) -> set:
+            response = client.get("/chapters", params=params)
+            assert response.status_code == 200, response.text
+            return {card["id"] for card in response.json()}
+
+        assert {loose["id"], imported["id"]} <= listed()
+        assert loose["id"] in listed(project_id=0) and imported["id"] not in listed(project_id=0)
+        assert listed(project_id=9) == {imported["id"]}
+
+
+def test_import_streams_chapters_in_several_chunks():
+    with TestClient(main.app) as client:
+        with SessionLocal() as db:
+            db.merge(Project(id=11, title="Importado"))
+            db.commit()
+        count = 45  # More than two staging batches (IMPORT_BATCH_CHAPTERS)
+        manuscript = "".join(f"# Capítulo {n}\n\nTexto do capítulo {n}.\n\n" for n in range(1, count + 1)).encode()
+
+        def body():
+            # Chunks of 37 bytes cut through headings and paragraphs
+            for start in range(0, len(manuscript), 37):
+                yield manuscript[start:start + 37]
+
+        response = client.post("/projects/11/import", content=body())
+        assert response.status_code == 200, response.text
+        assert response.json()["imported"] == count
+
+        cards = client.get("/chapters", params={"project_id": 11}).json()
+        assert [card["title"] for card in cards] == [f"Capítulo {n}" for n in range(1, count + 1)]
+        last = client.get(f"/chapters/{cards[-1]['id']}").json()
+        assert f"Texto do capítulo {count}." in last["content"]
+
+
+if __name__ == "__main__":
+    test_edit_ops_use_utf16_offsets()
+    test_edit_ops_replace_half_of_surrogate_pair()
+    test_edit_ops_reject_insert_past_the_end()
+    test_move_keeps_reading_order_through_rebalances()
+    test_revision_history_survives_compaction()
+    test_project_stats_deltas_match_a_rebuild()
+    test_search_project_zero_means_unassigned()
+    test_list_without_project_id_lists_every_chapter()
+    test_import_streams_chapters_in_several_chunks()
+    print("ok")
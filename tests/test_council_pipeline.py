@@ -0,0 +1,199 @@
+"""
+Critical path of pipelined polish vs plain polish, and provider scheduling by
+priority class, with fake providers whose latency depends on the step (no API
+keys or network needed).
+
+Run from the repo root:  python tests/test_council_pipeline.py  (or with pytest)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("ZENWRITER_DATA_DIR", tempfile.mkdtemp(prefix="zenwriter-test-"))
+
+from orchestrator import CLASS_QUOTAS, CouncilScheduler, EditorialCouncil, Priority
+
+SYNTHESIS_REPLY = '{"consensus": "c", "divergence": "d", "verdict": "v"}'
+
+
+class Reply:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeProvider:
+    """Sleeps for the latency of the step the prompt asks for."""
+
+    def __init__(self, council: EditorialCouncil, latencies: dict):
+        self.roles = {prompt: role for role, prompt in council.prompts.items()}
+        self.latencies = latencies
+
+    def step(self, messages) -> str:
+        prompt = messages[-1].content
+        if "Um terceiro parecer ainda vai chegar" in prompt:
+            return "draft"
+        if "Rascunho da síntese" in prompt:
+            return "merge"
+        if "TAREFA DE SÍNTESE" in prompt:
+            return "synthesis"
+        return self.roles[messages[0].content]
+
+    async def ainvoke(self, messages):
+        step = self.step(messages)
+        await asyncio.sleep(self.latencies[step])
+        return Reply(SYNTHESIS_REPLY if step in ("draft", "merge", "synthesis") else f"parecer {step}")
+
+
+def make_council(latencies: dict) -> EditorialCouncil:
+    council = EditorialCouncil()
+    council.claude = council.gemini = council.gpt = FakeProvider(council, latencies)
+    return council
+
+
+async def polish_seconds(council: EditorialCouncil, pipelined: bool) -> float:
+    started = time.perf_counter()
+    await council.polish_mode(
+        "O sol batia na janela.", "", "Projeto", "Lerner", "1", "1", "calmo", pipelined=pipelined
+    )
+    return time.perf_counter() - started
+
+
+def critical_paths(latencies: dict) -> tuple:
+    """(plain, pipelined) seconds, each after one warm-up run that fills the latency history."""
+    async def run():
+        plain_council, pipelined_council = make_council(latencies), make_council(latencies)
+        await polish_seconds(plain_council, pipelined=False)
+        await polish_seconds(pipelined_council, pipelined=True)
+        return (
+            await polish_seconds(plain_council, pipelined=False),
+            await polish_seconds(pipelined_council, pipelined=True),
+        )
+    return asyncio.run(run())
+
+
+def test_pipelined_shortens_critical_path_with_a_slow_expert():
+    # Structure expert lags: the draft fits in its shadow, only the merge follows it
+    plain, pipelined = critical_paths({
+        "claude_style": 0.1, "gemini_coherence": 0.1, "gpt_structure": 0.6,
+        "synthesis": 0.2, "draft": 0.2, "merge": 0.1,
+    })
+    print(f"slow expert: plain {plain * 1000:.0f} ms, pipelined {pipelined * 1000:.0f} ms")
+    assert pipelined < plain - 0.05
+
+
+def test_pipelined_falls_back_when_experts_finish_together():
+    # No time to draft before the last expert: plain synthesis, no extra call
+    plain, pipelined = critical_paths({
+        "claude_style": 0.2, "gemini_coherence": 0.2, "gpt_structure": 0.2,
+        "synthesis": 0.2, "draft": 0.2, "merge": 0.1,
+    })
+    print(f"even experts: plain {plain * 1000:.0f} ms, pipelined {pipelined * 1000:.0f} ms")
+    assert pipelined < plain + 0.05
+
+
+def test_report_keeps_chunk_count_out_of_timings():
+    council = make_council({
+        "claude_style": 0.01, "gemini_coherence": 0.01, "gpt_structure": 0.01,
+        "synthesis": 0.01, "draft": 0.01, "merge": 0.01,
+    })
+    text = "\n\n".join(" ".join(["palavra"] * 40) for _ in range(3))
+    with mock.patch("orchestrator.CHUNK_WORDS", 50):
+        report = asyncio.run(council.polish_mode(text, "", "Projeto", "Lerner", "1", "1", "calmo", chunked=True))
+    assert report.chunks == 3
+    assert all(key.endswith("_ms") for key in report.timings)
+
+
+async def settle():
+    """Lets granted waiters resume."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_scheduler_keeps_quotas_and_reserves():
+    async def run():
+        scheduler = CouncilScheduler(capacity=4)
+        pool = scheduler._pool(1)
+        assert pool.reserves[Priority.POLISH] == 1 and pool.reserves[Priority.BATCH] == 2
+
+        await scheduler.acquire(1, Priority.BATCH)
+        second_batch = asyncio.ensure_future(scheduler.acquire(1, Priority.BATCH))
+        await settle()
+        assert not second_batch.done()  # Batch quota is 1
+
+        await scheduler.acquire(1, Priority.POLISH)
+        await scheduler.acquire(1, Priority.POLISH)
+        third_polish = asyncio.ensure_future(scheduler.acquire(1, Priority.POLISH))
+        await settle()
+        assert not third_polish.done()  # Last free slot is reserved for flow/doubt
+
+        await asyncio.wait_for(scheduler.acquire(1, Priority.FLOW), 1)
+        assert sum(pool.in_use.values()) == 4
+
+        # Another provider has its own budget
+        await asyncio.wait_for(scheduler.acquire(2, Priority.BATCH), 1)
+
+        # Three busy: neither waiter fits
+        scheduler.release(1, Priority.BATCH)
+        await settle()
+        assert not third_polish.done() and not second_batch.done()
+
+        # A freed slot goes to the waiting polish call, not the earlier batch one
+        scheduler.release(1, Priority.FLOW)
+        await settle()
+        assert third_polish.done() and not second_batch.done()
+
+        # Batch only starts once two slots are free for the classes above it
+        scheduler.release(1, Priority.POLISH)
+        await settle()
+        assert not second_batch.done()
+        scheduler.release(1, Priority.POLISH)
+        await settle()
+        assert second_batch.done()
+        assert pool.in_use[Priority.BATCH] == CLASS_QUOTAS[Priority.BATCH]
+
+        stats = scheduler.get_stats()
+        assert stats["batch"]["queued"] == 1 and stats["polish"]["queued"] == 1
+        assert stats["flow"]["queued"] == 0
+    asyncio.run(run())
+
+
+def test_batch_polish_does_not_starve_interactive_polish():
+    latencies = {
+        "claude_style": 0.1, "gemini_coherence": 0.1, "gpt_structure": 0.1,
+        "synthesis": 0.1, "draft": 0.1, "merge": 0.1,
+    }
+
+    async def run():
+        council = make_council(latencies)
+        council.scheduler = CouncilScheduler(capacity=4)
+        finished = []
+
+        async def polish(priority: Priority):
+            await council.polish_mode(
+                "O sol batia na janela.", "", "Projeto", "Lerner", "1", "1", "calmo", priority=priority
+            )
+            finished.append(priority)
+
+        batch = asyncio.ensure_future(polish(Priority.BATCH))
+        await asyncio.sleep(0.01)  # The batch job is already holding a slot
+        await asyncio.gather(polish(Priority.POLISH), batch)
+        return council, finished
+
+    council, finished = asyncio.run(run())
+    assert finished == [Priority.POLISH, Priority.BATCH]
+    stats = council.scheduler.get_stats()
+    assert stats["batch"]["calls"] == 4 and stats["batch"]["queued"] >= 2
+    assert stats["polish"]["max_wait_ms"] < stats["batch"]["max_wait_ms"]
+
+
+if __name__ == "__main__":
+    test_pipelined_shortens_critical_path_with_a_slow_expert()
+    test_pipelined_falls_back_when_experts_finish_together()
+    test_report_keeps_chunk_count_out_of_timings()
+    test_scheduler_keeps_quotas_and_reserves()
+    test_batch_polish_does_not_starve_interactive_polish()
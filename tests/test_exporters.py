@@ -0,0 +1,120 @@
+"""
+Manuscript export: the incremental zip writer and each format streamed from
+/projects/{id}/export (FastAPI TestClient on a throwaway data directory).
+
+Run from the repo root:  python tests/test_exporters.py  (or with pytest)
+"""
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+# Before the backend is imported: database.py reads it at import time
+os.environ.setdefault("ZENWRITER_DATA_DIR", tempfile.mkdtemp(prefix="zenwriter-test-"))
+
+from fastapi.testclient import TestClient
+
+import main
+from database import SessionLocal
+from exporters import ZipStream, export_epub
+from models import Project
+
+PROJECT_ID = 41
+XHTML = "{http://www.w3.org/1999/xhtml}"
+CHAPTERS = [
+    ("Partida & chegada", "<p>Ela disse&nbsp;adeus &eacute; <em>partiu</em><br>cedo.</p><hr><p>Fim.</p>"),
+    ("Sem tags", "Pão & vinho.\n\nSegundo parágrafo."),
+    ("Listas", "<h2>Cena</h2><ul><li>um</li><li><strong>dois</strong></li></ul><blockquote><p>Citação</p></blockquote>"),
+]
+
+
+async def rows(chapters):
+    for chapter in chapters:
+        yield chapter
+
+
+def collect(generator) -> list:
+    async def run():
+        return [piece async for piece in generator]
+    return asyncio.run(run())
+
+
+def test_zip_stream_drains_a_valid_zip():
+    pieces = collect(export_epub("Livro", rows(CHAPTERS * 20)))
+    # Header, one piece per chapter, then the package files and central directory
+    assert len(pieces) == 1 + len(CHAPTERS) * 20 + 1
+    assert all(pieces[1:-1])
+    with zipfile.ZipFile(io.BytesIO(b"".join(pieces))) as book:
+        assert book.testzip() is None
+        assert len([name for name in book.namelist() if name.endswith(".xhtml")]) == len(CHAPTERS) * 20 + 1
+
+    stream = ZipStream()
+    stream.write(b"abc")
+    assert stream.drain() == b"abc" and stream.tell() == 3
+    stream.write(b"de")
+    assert stream.seek(3) == 3
+    try:
+        stream.seek(2)
+        assert False, "seek into drained data"
+    except io.UnsupportedOperation:
+        pass
+
+
+def export(client: TestClient, format: str) -> bytes:
+    with client.stream("GET", f"/projects/{PROJECT_ID}/export", params={"format": format}) as response:
+        assert response.status_code == 200, response.read()
+        return b"".join(response.iter_bytes())
+
+
+def create_project(client: TestClient):
+    with SessionLocal() as db:
+        db.merge(Project(id=PROJECT_ID, title="O Livro"))
+        db.commit()
+    for title, content in CHAPTERS:
+        response = client.post("/chapters", json={"title": title, "content": content, "project_id": PROJECT_ID})
+        assert response.status_code == 200, response.text
+
+
+def test_export_streams_every_format():
+    with TestClient(main.app) as client:
+        create_project(client)
+
+        markdown = export(client, "markdown").decode("utf-8")
+        assert markdown.startswith("# O Livro\n\n## Partida & chegada\n\n")
+        assert "*partiu*" in markdown and "- **dois**" in markdown and "> Citação" in markdown
+        assert markdown.index("Partida") < markdown.index("Sem tags") < markdown.index("Listas")
+
+        page = export(client, "html").decode("utf-8")
+        assert page.count("<section>") == len(CHAPTERS) and page.rstrip().endswith("</html>")
+
+        with zipfile.ZipFile(io.BytesIO(export(client, "epub"))) as book:
+            first = book.infolist()[0]
+            assert first.filename == "mimetype" and first.compress_type == zipfile.ZIP_STORED
+            assert book.read("mimetype") == b"application/epub+zip"
+            assert first.extra == b""  # Readers sniff the bytes at offset 38
+
+            chapter_files = sorted(name for name in book.namelist() if name.startswith("OEBPS/chapter-"))
+            assert len(chapter_files) == len(CHAPTERS)
+            for name, (title, _) in zip(chapter_files, CHAPTERS):
+                root = ET.fromstring(book.read(name))  # Raises on malformed XHTML
+                assert root.find(f"{XHTML}body/{XHTML}section/{XHTML}h1").text == title
+            text = "".join(ET.fromstring(book.read(chapter_files[0])).itertext())
+            assert "disse adeus é" in text
+
+            ET.fromstring(book.read("OEBPS/nav.xhtml"))
+            package = ET.fromstring(book.read("OEBPS/content.opf"))
+            spine = package.find("{http://www.idpf.org/2007/opf}spine")
+            assert len(spine) == len(CHAPTERS)
+
+        assert client.get("/projects/999999/export").status_code == 404
+
+
+if __name__ == "__main__":
+    test_zip_stream_drains_a_valid_zip()
+    test_export_streams_every_format()
+    print("ok")
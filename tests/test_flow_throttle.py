@@ -0,0 +1,82 @@
+"""
+Adaptive flow-check window: deferral, EWMA velocity/alert rate and the
+[FLOW_MIN_INTERVAL, FLOW_MAX_INTERVAL] clamp, on a fake clock.
+
+Run from the repo root:  python tests/test_flow_throttle.py  (or with pytest)
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from flow_throttle import (
+    FLOW_MAX_INTERVAL, FLOW_MEANINGFUL_CHARS, FLOW_MIN_INTERVAL, ChapterFlowState, FlowThrottle,
+)
+
+
+def test_unchanged_and_small_edits_are_deferred():
+    throttle = FlowThrottle()
+    assert throttle.admit("s:1", "Era uma vez.", now=100.0) is None  # First check always runs
+
+    # Same text: nothing to check, wait a full window
+    retry_after = throttle.admit("s:1", "Era uma vez.", now=101.0)
+    assert retry_after is not None and retry_after >= FLOW_MIN_INTERVAL
+
+    # Small edit inside the window: the rest of the window
+    retry_after = throttle.admit("s:1", "Era uma vez um.", now=102.0)
+    state = throttle._states["s:1"]
+    assert abs(retry_after - (throttle.interval_for(state) - 2.0)) < 1e-9
+
+    # Once the window has passed the pending edit gets its check
+    assert throttle.admit("s:1", "Era uma vez um.", now=102.0 + FLOW_MAX_INTERVAL) is None
+    assert throttle.get_stats() == {"checked": 2, "deferred": 2, "tracked_chapters": 1}
+
+
+def test_meaningful_edit_skips_the_window():
+    throttle = FlowThrottle()
+    assert throttle.admit("s:1", "a", now=0.0) is None
+    assert throttle.admit("s:1", "a" * (FLOW_MEANINGFUL_CHARS + 1), now=0.5) is None
+
+
+def test_fast_typing_stretches_the_interval_up_to_the_max():
+    throttle = FlowThrottle()
+    text, now = "", 0.0
+    intervals = []
+    for _ in range(30):
+        text += "x" * 50  # 100 chars/s, well above FLOW_VELOCITY_REF
+        now += 0.5
+        throttle.admit("s:1", text, now=now)
+        intervals.append(throttle.interval_for(throttle._states["s:1"]))
+    assert intervals == sorted(intervals)  # EWMA climbs towards the typing speed
+    assert intervals[0] < FLOW_MAX_INTERVAL
+    assert intervals[-1] == FLOW_MAX_INTERVAL
+
+
+def test_alerts_shrink_the_interval_down_to_the_min():
+    throttle = FlowThrottle()
+    state = throttle._states["s:1"] = ChapterFlowState(velocity=0.0)
+    assert throttle.interval_for(state) == FLOW_MIN_INTERVAL  # Idle writer: already at the floor
+    for _ in range(20):
+        throttle.record_result("s:1", alerted=True)
+    assert 0.99 < state.alert_rate <= 1.0
+    assert throttle.interval_for(state) == FLOW_MIN_INTERVAL  # Halved, then clamped
+
+    # Mid typing speed: alerts halve a window that would otherwise be longer
+    state.velocity = 20.0
+    alerting = throttle.interval_for(state)
+    for _ in range(20):
+        throttle.record_result("s:1", alerted=False)
+    quiet = throttle.interval_for(state)
+    assert FLOW_MIN_INTERVAL <= alerting < quiet <= FLOW_MAX_INTERVAL
+
+    throttle.record_result("unknown", alerted=True)  # No state: ignored
+    assert "unknown" not in throttle._states
+
+
+if __name__ == "__main__":
+    test_unchanged_and_small_edits_are_deferred()
+    test_meaningful_edit_skips_the_window()
+    test_fast_typing_stretches_the_interval_up_to_the_max()
+    test_alerts_shrink_the_interval_down_to_the_min()
+    print("ok")
@@ -0,0 +1,55 @@
+"""
+Adjective inflections behind the style metrics lexicons, and the counts they
+give on a short Portuguese passage (no database or LLM needed).
+
+Run from the repo root:  python tests/test_style_metrics.py  (or with pytest)
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from style_metrics import ADJECTIVES, _inflections, analyze_style
+
+# One lemma per rule, with every form a grammar lists for it
+INFLECTIONS = {
+    "bonito": {"bonito", "bonita", "bonitos", "bonitas"},
+    "encantador": {"encantador", "encantadora", "encantadores", "encantadoras"},
+    "bom": {"bom", "boa", "bons", "boas"},
+    "mau": {"mau", "má", "maus", "más"},
+    "cruel": {"cruel", "cruéis"},
+    "amável": {"amável", "amáveis"},
+    "natural": {"natural", "naturais"},
+    "azul": {"azul", "azuis"},
+    "gentil": {"gentil", "gentis"},
+    "frágil": {"frágil", "frágeis"},
+    "comum": {"comum", "comuns"},
+    "feliz": {"feliz", "felizes"},
+    "simples": {"simples"},
+    "triste": {"triste", "tristes"},
+}
+
+
+def test_inflection_table():
+    for lemma, forms in INFLECTIONS.items():
+        assert set(_inflections(lemma)) == forms, lemma
+    assert set(INFLECTIONS) <= set(ADJECTIVES)
+
+
+def test_passage_counts_irregular_forms():
+    passage = (
+        "A menina boa sorriu. As casas eram boas e bonitas, mas o homem cruel riu; "
+        "os reis cruéis também, e as paredes frágeis tremeram: talvez fossem simples demais."
+    )
+    result = analyze_style(passage)
+    assert result.counts["adjectives"] == 7  # boa, boas, bonitas, cruel, cruéis, frágeis, simples
+    assert result.counts["lazy_adjectives"] == 3
+    assert dict(result.lazy_adjectives) == {"boa": 1, "boas": 1, "bonitas": 1}
+    assert result.counts["hesitations"] == 1 and result.counts["intensifiers"] == 1
+
+
+if __name__ == "__main__":
+    test_inflection_table()
+    test_passage_counts_irregular_forms()
+    print("ok")